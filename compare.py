@@ -1,165 +1,844 @@
-from scipy.stats import kendalltau, spearmanr
+import math
+from itertools import islice
+
+import numpy as np
+from scipy.stats import spearmanr
 from editdistance import (
     eval as edit_distance_eval,
 )
 
+from inversions import count_inversions, kendall_distance
+from profiling import Profiler, profiled
+from ranked_list import RankedList
+
+
+# Metric name -> the ListSimilarity method computing it, in report order.
+METRICS = {
+    "edit_distance": "edit_distance",
+    "edit_distance_normalized": "edit_distance_normalized",
+    "bubblesort_distance": "bubblesort_distance",
+    "kendall_tau": "kendall_tau_distance",
+    "spearman_correlation": "spearman_correlation",
+    "jaccard_similarity": "jaccard_similarity",
+    "rbo": "rbo",
+    "topk_kendall": "topk_kendall_distance",
+    "topk_footrule": "topk_footrule_distance",
+    "rank_based_edit_distance": "rank_based_edit_distance",
+}
+
+# The metrics composite_score combines.
+COMPOSITE_METRICS = (
+    "jaccard_similarity",
+    "rbo",
+    "spearman_correlation",
+    "kendall_tau",
+    "edit_distance_normalized",
+)
+
+
+# Charge of top-k Kendall for pairs whose relative order is unknown.
+TOPK_KENDALL_PENALTY = 0.5
+
+
+def select_metrics(metrics=None) -> list[str]:
+    """
+    Validate a metric selection, returning the names in report order.
+
+    None selects every metric.
+    """
+    if metrics is None:
+        return list(METRICS)
+    unknown = set(metrics) - set(METRICS)
+    if unknown:
+        raise ValueError(
+            f"Unknown metrics: {', '.join(sorted(unknown))} "
+            f"(choose from {', '.join(METRICS)})"
+        )
+    return [name for name in METRICS if name in metrics]
+
+
+def _gather(values: np.ndarray, index: np.ndarray, missing) -> np.ndarray:
+    """
+    values[index] where index >= 0; elsewhere the (broadcast) missing values,
+    in order.
+    """
+    gathered = np.empty(len(index), dtype=np.int64)
+    found = index >= 0
+    gathered[found] = values[index[found]]
+    gathered[~found] = missing
+    return gathered
+
 
 class ListSimilarity:
-    def __init__(self, list1, list2, rbo_p=0.9, lazy_compute=False):
+    def __init__(
+        self,
+        list1,
+        list2,
+        rbo_p=0.9,
+        lazy_compute=False,
+        profiler: Profiler | None = None,
+        metrics=None,
+        depth: int | None = None,
+    ):
         """
         Initialize the ListSimilarity instance.
 
+        Both lists are interned into RankedList objects first. Passing
+        RankedList objects that share a vocabulary reuses their IDs and lookup
+        tables, so repeated comparisons against the same list skip that work.
+
         Parameters:
-            list1, list2: The lists to compare.
+            list1, list2: The lists to compare, as sequences or RankedList objects.
             rbo_p: The weight decay parameter for RBO.
             lazy_compute: If True, metrics are computed on demand instead of during initialization.
+            profiler: Optional Profiler that records wall time and call counts of
+                every metric, under its name in METRICS, and of the shared rank
+                and overlap computations. Values served from a cache are not
+                counted as calls.
+            metrics: Names of the metrics to report (see METRICS); None selects
+                all of them. Only these, and what they depend on, are computed.
+            depth: If given, only the top `depth` items of each list are
+                compared, by every metric; the rest of the lists is never read.
         """
-        self.list1 = list1
-        self.list2 = list2
+        if depth is not None and depth < 1:
+            raise ValueError(f"depth must be positive, got {depth}")
+        self.depth = depth
+        if depth is not None:
+            list1, list2 = (
+                items.head(depth)
+                if isinstance(items, RankedList)
+                else list(islice(items, depth))
+                for items in (list1, list2)
+            )
+        vocabulary = next(
+            (
+                items.vocabulary
+                for items in (list1, list2)
+                if isinstance(items, RankedList) and items.vocabulary is not None
+            ),
+            None,
+        )
+        owned = vocabulary is None
+        if owned:
+            vocabulary = {}
+        self.ranked1, self.ranked2 = (
+            RankedList.encode(items, vocabulary) for items in (list1, list2)
+        )
+        if owned:
+            # Only these two lists use it, and they are encoded; keeping it
+            # would hold an entry per distinct item for the instance's life.
+            self.ranked1.drop_vocabulary()
+            self.ranked2.drop_vocabulary()
+        self.list1, self.list2 = self.ranked1.items, self.ranked2.items
         self.rbo_p = rbo_p
         self.lazy_compute = lazy_compute
+        self.profiler = profiler
+        self.selected = select_metrics(metrics)
+        self._ranks: tuple[np.ndarray, np.ndarray] | None = None
+        self._kendall_tau: tuple[float, float] | None = None
+        self._values: dict[str, float] = {}
         self.metrics = None if lazy_compute else self._compute_all()
 
     def _compute_all(self):
         """
-        Compute all similarity metrics and store them in a dictionary.
+        Compute the selected similarity metrics and store them in a dictionary.
 
         Returns:
             A dictionary of precomputed metrics.
         """
-        return {
-            "edit_distance": self.edit_distance(),
-            "edit_distance_normalized": self.edit_distance_normalized(),
-            "bubblesort_distance": self.bubblesort_distance(),
-            "kendall_tau": self.kendall_tau_distance(),
-            "spearman_correlation": self.spearman_correlation(),
-            "jaccard_similarity": self.jaccard_similarity(),
-            "rbo": self.rbo(),
-        }
+        return {name: self.metric(name) for name in self.selected}
 
-    def _ensure_metrics(self):
+    def metric(self, name: str) -> float:
         """
-        Ensure metrics are computed if lazy_compute is enabled.
+        The value of one metric, computed on first access and cached.
+
+        Any metric can be requested, selected or not.
         """
-        if self.metrics is None:
-            self.metrics = self._compute_all()
+        if name not in self._values:
+            if name not in METRICS:
+                raise ValueError(f"Unknown metric: {name}")
+            self._values[name] = getattr(self, METRICS[name])()
+        return self._values[name]
 
-    def _aligned_ranks(self) -> tuple[list[int], list[int]]:
+    def _aligned_ranks(self) -> tuple[np.ndarray, np.ndarray]:
         """
-        Build aligned rank vectors over the union of items.
+        Aligned rank vectors over the union of items.
 
         Items appear in the order of list1 first, then any unseen items from list2.
         Missing items in each list get unique tail ranks so there are no ties.
+        The vectors are built once and shared by every rank-based metric.
         """
+        if self._ranks is None:
+            self._ranks = self._build_aligned_ranks()
+        return self._ranks
 
-        def ranks(primary: list, secondary: list, universe: list) -> list[int]:
-            base = {item: idx for idx, item in enumerate(primary)}
-            tail_start = len(primary)
-            for offset, item in enumerate(x for x in secondary if x not in base):
-                base[item] = tail_start + offset
-            return [base[item] for item in universe]
-
-        universe = list(dict.fromkeys([*self.list1, *self.list2]))
+    @profiled(name="_aligned_ranks")
+    def _build_aligned_ranks(self) -> tuple[np.ndarray, np.ndarray]:
+        ranked1, ranked2 = self.ranked1, self.ranked2
+        only1 = ranked1.distinct_ids[ranked2.locate(ranked1.distinct_ids) < 0]
+        only2 = ranked2.distinct_ids[ranked1.locate(ranked2.distinct_ids) < 0]
+        universe = np.concatenate([ranked1.distinct_ids, only2])
+        # Items missing from a list rank past its end, in the order the other
+        # list has them.
         return (
-            ranks(self.list1, self.list2, universe),
-            ranks(self.list2, self.list1, universe),
+            _gather(
+                ranked1.last_positions,
+                ranked1.locate(universe),
+                len(ranked1) + np.arange(len(only2)),
+            ),
+            _gather(
+                ranked2.last_positions,
+                ranked2.locate(universe),
+                len(ranked2) + np.arange(len(only1)),
+            ),
         )
 
+    def _kendall(self) -> tuple[float, float]:
+        """
+        Kendall tau and bubblesort distance over the aligned ranks, computed
+        together once per instance.
+        """
+        if self._kendall_tau is None:
+            self._kendall_tau = self._kendall_distance()
+        return self._kendall_tau
+
+    @profiled(name="_kendall")
+    def _kendall_distance(self) -> tuple[float, float]:
+        return kendall_distance(*self._aligned_ranks())
+
+    @profiled
     def bubblesort_distance(self) -> float:
         """
         Calculate the normalized bubblesort distance between two lists.
 
-        Uses Kendall Tau on aligned rank vectors; missing items are treated as
-        appearing after known items in the list where they are absent.
+        The share of discordant pairs in the aligned rank vectors, i.e.
+        (1 - tau) / 2; missing items are treated as appearing after known items
+        in the list where they are absent.
         """
-        ranks1, ranks2 = self._aligned_ranks()
-        kt_corr, _ = kendalltau(ranks1, ranks2)
-        if kt_corr is None:
-            return 0.0
-        return (1 - kt_corr) / 2
+        _, distance = self._kendall()
+        return distance
 
+    @profiled
     def edit_distance(self):
         """
         Compute the edit distance between two lists.
         """
-        return edit_distance_eval(self.list1, self.list2)
+        return edit_distance_eval(self.ranked1.ids.tolist(), self.ranked2.ids.tolist())
 
+    @profiled
     def edit_distance_normalized(self):
         """
         Compute the normalized edit distance between two lists.
         """
-        distance = self.edit_distance()
+        distance = self.metric("edit_distance")
         max_length = max(len(self.list1), len(self.list2))
         return distance / max_length if max_length > 0 else 0
 
+    @profiled
+    def rank_based_edit_distance(self, base_weights=None, band=None) -> float:
+        """
+        Compute a rank-aware Damerau edit distance between two lists.
+
+        Substituting one item for another costs the substitution weight times
+        one plus how far apart their ranks (positions in their own lists) are,
+        so a different item costs something even at the same rank; matching
+        items cost nothing. Insertions and deletions cost their weight times a
+        rank penalty of the longer list's length plus one, more than any
+        substitution, and swapping two adjacent items costs the transposition
+        weight.
+
+        The DP table is filled one row at a time with array operations: the
+        dependency on the cell to the left only ever adds a constant insertion
+        cost, so a whole row resolves with a running minimum. Rows run over the
+        longer list, so only three rows of the shorter list's length are kept.
+
+        Parameters:
+            base_weights: Weights for "insertion", "deletion", "substitution" and
+                "transposition". By default insertions and deletions weigh the
+                longer list's length, substitutions twice that, and
+                transpositions 1, so swapping two neighbours is the cheapest
+                edit. Identical lists are at distance 0, and any other pair
+                further apart.
+            band: If given, only alignments that stay within this many positions
+                of the diagonal are considered (at least the length difference).
+                The result is then an upper bound of the exact distance, computed
+                in O(len * band).
+        """
+        n, m = len(self.list1), len(self.list2)
+        if base_weights is None:
+            scale = max(n, m)
+            base_weights = {
+                "insertion": scale,
+                "deletion": scale,
+                "substitution": 2 * scale,
+                "transposition": 1,
+            }
+
+        penalty = max(n, m) + 1  # Rank penalty for inserted and deleted items
+        insertion = base_weights["insertion"] * penalty
+        deletion = base_weights["deletion"] * penalty
+        substitution = base_weights["substitution"]
+        transposition = base_weights["transposition"]
+
+        rows, cols = self.ranked1, self.ranked2
+        if n < m:
+            # The transposed table swaps the roles of insertion and deletion.
+            rows, cols = cols, rows
+            insertion, deletion = deletion, insertion
+
+        def encode(items: RankedList) -> tuple[np.ndarray, np.ndarray]:
+            ranks = items.last_positions[items.locate(items.ids)]
+            return items.ids.astype(np.int64), ranks.astype(np.int64)
+
+        row_ids, row_ranks = encode(rows)
+        col_ids, col_ranks = encode(cols)
+        height, width = len(row_ids), len(col_ids) + 1
+        col_positions: dict = {}
+        for position, code in enumerate(col_ids.tolist()):
+            col_positions.setdefault(code, []).append(position)
+        col_positions = {code: np.array(p) for code, p in col_positions.items()}
+        if band is None:
+            band = height + width
+        band = max(band, height - (width - 1))
+
+        offsets = np.arange(width) * insertion
+        prev = np.where(np.arange(width) <= band, offsets, np.inf).astype(float)
+        prev2 = prev
+        for i in range(1, height + 1):
+            cur = np.full(width, np.inf)
+            if i <= band:
+                cur[0] = i * deletion
+            lo, hi = max(1, i - band), min(width - 1, i + band)
+            if lo <= hi:
+                item = row_ids[i - 1]
+                cost = substitution * (
+                    1 + np.abs(row_ranks[i - 1] - col_ranks[lo - 1 : hi])
+                )
+                cost[col_ids[lo - 1 : hi] == item] = 0
+                best = np.minimum(
+                    prev[lo - 1 : hi] + cost, prev[lo : hi + 1] + deletion
+                )
+
+                if i > 1 and item in col_positions:
+                    # Columns j with cols[j - 2] == rows[i - 1], cols[j - 1] == rows[i - 2]
+                    j = col_positions[item] + 2
+                    j = j[(j >= lo) & (j <= hi)]
+                    j = j[col_ids[j - 1] == row_ids[i - 2]]
+                    best[j - lo] = np.minimum(
+                        best[j - lo], prev2[j - 2] + transposition
+                    )
+
+                # cur[j] = min_k (best[k] + (j - k) * insertion), including cur[lo - 1]
+                chain = np.concatenate([[cur[lo - 1]], best])
+                shift = offsets[lo - 1 : hi + 1]
+                cur[lo - 1 : hi + 1] = shift + np.minimum.accumulate(chain - shift)
+            prev2, prev = prev, cur
+
+        return float(prev[-1])
+
+    @profiled(name="kendall_tau")
     def kendall_tau_distance(self) -> float:
         """
         Compute Kendall Tau distance between two lists.
         """
-        ranks1, ranks2 = self._aligned_ranks()
-        tau, _ = kendalltau(ranks1, ranks2)
-        return 0.0 if tau is None else tau
+        tau, _ = self._kendall()
+        return tau
 
+    @profiled
     def spearman_correlation(self) -> float:
         """
         Compute Spearman rank correlation between two lists.
+
+        When neither list repeats an item, the aligned ranks are permutations
+        of 0..n-1 and the closed form 1 - 6 * sum(d^2) / (n * (n^2 - 1)) is
+        exact, so scipy's re-ranking is skipped.
         """
 
         ranks1, ranks2 = self._aligned_ranks()
+        n = len(ranks1)
+        if n > 1 and self.ranked1.is_distinct and self.ranked2.is_distinct:
+            squared = int(((ranks1 - ranks2) ** 2).sum())
+            return 1 - 6 * squared / (n * (n**2 - 1))
         spear_corr, _ = spearmanr(ranks1, ranks2)
         return 0.0 if spear_corr is None else spear_corr
 
+    def _distinct_ranks(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The rank among list2's distinct items of each distinct item of list1,
+        in list1's order, with -1 for items missing from list2; and, the other
+        way around, which of list2's distinct items, in its order, list1 has.
+        """
+        ranked1, ranked2 = self.ranked1, self.ranked2
+        ranks2 = _gather(
+            ranked2.distinct_ranks, ranked2.locate(ranked1.distinct_ids), -1
+        )
+        in1 = ranked1.locate(ranked2.distinct_ids) >= 0
+        return ranks2, ranks2 >= 0, in1
+
+    @profiled(name="topk_kendall")
+    def topk_kendall_distance(self, penalty: float = TOPK_KENDALL_PENALTY) -> float:
+        """
+        Compute the normalized top-k Kendall distance K^(p) (Fagin et al. 2003).
+
+        The lists are treated as top-k lists: an item missing from one list
+        ranks somewhere below all of its items. Every pair of items from the
+        union is charged
+            - 1 if both are in both lists and ordered differently;
+            - 1 if both are in one list and only the lower ranked of the two is
+              in the other list (the other list must rank it higher);
+            - 1 if each item is in only one of the lists, a different one each;
+            - `penalty` if both are in one list only, as their order in the
+              other list is unknown (0.5 is the neutral choice).
+        The total is divided by its value for two disjoint lists, so 0 means the
+        same ranking and 1 means no item in common.
+
+        Parameters:
+            penalty: The charge for pairs whose order is unknown, in [0, 1].
+        """
+        ranks2, common1, common2 = self._distinct_ranks()
+        k1, k2 = len(common1), len(common2)
+        if not k1 and not k2:
+            return 0.0
+
+        only1 = k1 - int(common1.sum())
+        only2 = k2 - int(common2.sum())
+
+        # Both items in both lists: count the discordant pairs.
+        discordant = count_inversions(ranks2[common1])
+
+        # One item in both lists, the other above it in just one list.
+        def missing_above(common: np.ndarray) -> int:
+            below = np.cumsum(common[::-1])[::-1]
+            return int(below[~common].sum())
+
+        distance = (
+            discordant
+            + missing_above(common1)
+            + missing_above(common2)
+            + only1 * only2
+            + penalty * (only1 * (only1 - 1) + only2 * (only2 - 1)) / 2
+        )
+        maximum = k1 * k2 + penalty * (k1 * (k1 - 1) + k2 * (k2 - 1)) / 2
+        return distance / maximum if maximum else 0.0
+
+    @profiled(name="topk_footrule")
+    def topk_footrule_distance(self) -> float:
+        """
+        Compute the normalized top-k Spearman footrule F^(l) (Fagin et al. 2003).
+
+        Items missing from a list are placed at the location l = k + 1, just
+        past the longer list, and the footrule sums |rank1 - rank2| over the
+        union. It is divided by its value for two disjoint lists, so 0 means the
+        same ranking and 1 means no item in common.
+        """
+        ranks2, common1, common2 = self._distinct_ranks()
+        k1, k2 = len(common1), len(common2)
+        location = max(k1, k2)
+        ranks1 = np.arange(k1)
+        placed2 = np.where(common1, ranks2, location)
+        distance = int(np.abs(ranks1 - placed2).sum())
+        distance += int((location - np.arange(k2)[~common2]).sum())
+        maximum = int((location - ranks1).sum() + (location - np.arange(k2)).sum())
+        return distance / maximum if maximum else 0.0
+
+    @profiled
     def jaccard_similarity(self):
         """
         Compute Jaccard similarity between two lists.
         """
-        set1, set2 = set(self.list1), set(self.list2)
-        intersection = len(set1 & set2)
-        union = len(set1 | set2)
+        unique1, unique2 = self.ranked1.unique_ids, self.ranked2.unique_ids
+        intersection = len(np.intersect1d(unique1, unique2, assume_unique=True))
+        union = len(unique1) + len(unique2) - intersection
         return intersection / union if union != 0 else 0
 
-    def rbo(self):
+    @profiled
+    def _overlap_sweep(self, depth: int) -> list[int]:
         """
-        Compute Rank-Biased Overlap (RBO) between two lists.
+        Overlap sizes |list1[:d] & list2[:d]| for every d in 1..depth.
+
+        An item shared by both lists joins the prefix overlap at the later of its
+        two first positions and stays in it, so the overlaps are a cumulative
+        count of those entry depths. Past the end of a list its prefix simply
+        stops growing.
         """
+        ranked1, ranked2 = self.ranked1, self.ranked2
+        _, shared1, shared2 = np.intersect1d(
+            ranked1.unique_ids,
+            ranked2.unique_ids,
+            assume_unique=True,
+            return_indices=True,
+        )
+        entries = np.maximum(
+            ranked1.first_positions[shared1], ranked2.first_positions[shared2]
+        )
+        joined = np.bincount(entries, minlength=depth)
+        return np.cumsum(joined[:depth]).tolist()
 
-        def overlap_at_depth(depth):
-            return len(set(self.list1[:depth]) & set(self.list2[:depth])) / depth
+    @profiled
+    def rbo(self):
+        """
+        Compute Rank-Biased Overlap (RBO) between two lists.
 
+        The sum is truncated at the length of the shorter list, with no
+        extrapolation beyond it. See `rbo_ext` and `rbo_bounds` for the full
+        Webber et al. estimates.
+        """
         k = min(len(self.list1), len(self.list2))
         score = 0
-        for d in range(1, k + 1):
-            overlap = overlap_at_depth(d)
-            score += (1 - self.rbo_p) * (self.rbo_p ** (d - 1)) * overlap
+        for d, overlap in enumerate(self._overlap_sweep(k), start=1):
+            score += (1 - self.rbo_p) * (self.rbo_p ** (d - 1)) * overlap / d
         return score
 
+    @profiled
+    def rbo_ext(self) -> float:
+        """
+        Compute extrapolated RBO (RBO_ext, Webber et al. 2010, eq. 32).
+
+        Lists of uneven length are handled by assuming the unseen part of the
+        shorter list keeps agreeing at the rate observed over its full length, and
+        that agreement past the longer list stays at the last observed level.
+        """
+        p = self.rbo_p
+        s, l = sorted((len(self.list1), len(self.list2)))
+        if s == 0:
+            return 0.0
+
+        overlaps = self._overlap_sweep(l)
+        x_s = overlaps[s - 1]
+        score = 0.0
+        for d, overlap in enumerate(overlaps, start=1):
+            agreement = overlap / d
+            if d > s:
+                agreement += x_s * (d - s) / (s * d)
+            score += (1 - p) * p ** (d - 1) * agreement
+        return score + p**l * ((overlaps[-1] - x_s) / l + x_s / s)
+
+    @profiled
+    def rbo_bounds(self) -> tuple[float, float]:
+        """
+        Compute the (RBO_min, RBO_max) bounds on the full RBO score.
+
+        RBO_min assumes nothing beyond the evaluated prefixes overlaps and RBO_max
+        assumes everything does; the gap is the residual RBO_res of Webber et
+        al. (2010). For lists of lengths s <= l, agreement is fully determined
+        from depth f = s + l - overlap on, so the sums stop there and the tail
+        uses the closed form sum_{d>n} p^(d-1) / d = (-ln(1-p) - sum_{d<=n} p^d/d) / p.
+        """
+        p = self.rbo_p
+        s, l = sorted((len(self.list1), len(self.list2)))
+        overlaps = self._overlap_sweep(l)
+        x_l = overlaps[-1] if overlaps else 0
+        f = s + l - x_l
+
+        log_tail = -math.log(1 - p)
+        rbo_min = 0.0
+        residual = 0.0
+        for d in range(1, f + 1):
+            weight = (1 - p) * p ** (d - 1) / d
+            log_tail -= p**d / d
+            if d <= l:
+                rbo_min += weight * overlaps[d - 1]
+            else:
+                rbo_min += weight * x_l
+            if d > l:
+                residual += weight * min(d - x_l, 2 * d - s - l)
+            elif d > s:
+                residual += weight * (d - s)
+
+        tail = (1 - p) / p * log_tail
+        rbo_min += x_l * tail
+        residual += p**f - x_l * tail
+        return rbo_min, rbo_min + residual
+
+    @profiled
     def composite_score(self, weights=None):
         """
         Compute a composite similarity score for two lists.
 
+        Only the metrics it combines are computed. With lazy_compute, .metrics
+        is then filled in with the selected metrics computed so far, so it can
+        be read after scoring, as before metrics were computed on demand.
+
         Parameters:
             weights: A dictionary of weights for the metrics.
 
         Returns:
             A composite similarity score between 0 and 1.
         """
-        self._ensure_metrics()
-        if weights is None:
-            weights = {
-                "jaccard": 0.3,
-                "rbo": 0.3,
-                "spearman": 0.2,
-                "kendall": 0.1,
-                "edit_distance": 0.1,
+        score = _composite(
+            {name: self.metric(name) for name in COMPOSITE_METRICS}, weights
+        )
+        if self.lazy_compute:
+            self.metrics = {
+                name: self._values[name]
+                for name in self.selected
+                if name in self._values
             }
+        return score
 
-        metrics = self.metrics
-        assert metrics is not None, "Metrics have not been computed yet"
 
-        return (
-            weights["jaccard"] * metrics["jaccard_similarity"]
-            + weights["rbo"] * metrics["rbo"]
-            + weights["spearman"] * max(0, metrics["spearman_correlation"])
-            + weights["kendall"] * max(0, metrics["kendall_tau"])
-            + weights["edit_distance"] * (1 - metrics["edit_distance_normalized"])
+DEFAULT_WEIGHTS = {
+    "jaccard": 0.3,
+    "rbo": 0.3,
+    "spearman": 0.2,
+    "kendall": 0.1,
+    "edit_distance": 0.1,
+}
+
+
+def _composite(metrics, weights=None):
+    """
+    Weighted combination of precomputed metrics.
+
+    Works on scalars as well as on metric matrices; negative (and undefined)
+    correlations contribute nothing.
+    """
+    if weights is None:
+        weights = DEFAULT_WEIGHTS
+
+    return (
+        weights["jaccard"] * metrics["jaccard_similarity"]
+        + weights["rbo"] * metrics["rbo"]
+        + weights["spearman"] * np.fmax(metrics["spearman_correlation"], 0)
+        + weights["kendall"] * np.fmax(metrics["kendall_tau"], 0)
+        + weights["edit_distance"] * (1 - metrics["edit_distance_normalized"])
+    )
+
+
+class MatrixSimilarity:
+    def __init__(self, lists1, lists2=None, rbo_p=0.9, chunk_size=64):
+        """
+        Compare every list in lists1 against every list in lists2 at once.
+
+        All lists are encoded into one shared integer vocabulary and each metric
+        is computed for a whole row of the result with array operations, instead
+        of building one ListSimilarity per pair. Lists are treated as rankings, so
+        a repeated item keeps only its first position; for duplicate-free lists
+        every entry equals the ListSimilarity metric of the same name. The
+        rank-based edit distance, a DP per pair, is left to ListSimilarity.
+
+        Parameters:
+            lists1, lists2: Sequences of lists to compare. If lists2 is omitted,
+                lists1 is compared against itself.
+            rbo_p: The weight decay parameter for RBO.
+            chunk_size: How many lists2 entries have their Kendall inversions
+                counted in one batch; bounds memory for long lists.
+
+        The metrics attribute maps each metric name to a len(lists1) x
+        len(lists2) array.
+        """
+        self.lists1 = lists1
+        self.lists2 = lists1 if lists2 is None else lists2
+        self.rbo_p = rbo_p
+        self.chunk_size = chunk_size
+        self.metrics = self._compute_all()
+
+    def _encode(self) -> tuple[list[np.ndarray], list[np.ndarray], int]:
+        """
+        Map every item to an integer ID shared across both sides.
+        """
+        vocabulary: dict = {}
+
+        def encode(items) -> np.ndarray:
+            unique = dict.fromkeys(items)
+            return np.fromiter(
+                (vocabulary.setdefault(item, len(vocabulary)) for item in unique),
+                dtype=np.int64,
+                count=len(unique),
+            )
+
+        encoded1 = [encode(items) for items in self.lists1]
+        encoded2 = [encode(items) for items in self.lists2]
+        return encoded1, encoded2, len(vocabulary)
+
+    def _compute_all(self) -> dict[str, np.ndarray]:
+        """
+        Compute every metric matrix, one lists1 row at a time.
+        """
+        encoded1, encoded2, vocab_size = self._encode()
+        n, m = len(encoded1), len(encoded2)
+        p = self.rbo_p
+
+        lengths2 = np.array([len(ids) for ids in encoded2], dtype=np.int64)
+        width2 = int(lengths2.max(initial=0))
+        # Padded ID matrix of lists2 (pad -1) and the matching position table.
+        ids2 = np.full((m, width2), -1, dtype=np.int64)
+        positions2 = np.full((m, vocab_size + 1), -1, dtype=np.int64)
+        for row, ids in enumerate(encoded2):
+            ids2[row, : len(ids)] = ids
+            positions2[row, ids] = np.arange(len(ids))
+        valid2 = ids2 >= 0
+        tokens = [ids.tolist() for ids in encoded2]
+
+        # cumulative[d] = sum_{i<=d} p^(i-1) / i, the RBO weight up to depth d.
+        max_depth = max([width2, *(len(ids) for ids in encoded1)], default=0)
+        depths = np.arange(1, max_depth + 1)
+        cumulative = np.concatenate([[0.0], np.cumsum(p ** (depths - 1) / depths)])
+
+        names = [
+            "edit_distance",
+            "edit_distance_normalized",
+            "bubblesort_distance",
+            "kendall_tau",
+            "spearman_correlation",
+            "jaccard_similarity",
+            "rbo",
+            "topk_kendall",
+            "topk_footrule",
+        ]
+        metrics = {name: np.zeros((n, m)) for name in names}
+
+        for row, ids1 in enumerate(encoded1):
+            length1 = len(ids1)
+            positions1 = np.full(vocab_size + 1, -1, dtype=np.int64)
+            positions1[ids1] = np.arange(length1)
+
+            # Position of each list1 item in every lists2 entry, and vice versa.
+            in2 = positions2[:, ids1]
+            in1 = np.where(valid2, positions1[ids2], -1)
+            common = in2 >= 0
+            only1 = ~common
+            only2 = valid2 & (in1 < 0)
+            intersection = common.sum(axis=1)
+            union = length1 + lengths2 - intersection
+
+            metrics["jaccard_similarity"][row] = np.divide(
+                intersection, union, out=np.zeros(m), where=union > 0
+            )
+
+            # An item shared by both lists enters the prefix overlap at depth
+            # max(pos1, pos2) + 1 and stays there until the truncation depth k.
+            k = np.minimum(length1, lengths2)
+            entry = np.maximum(np.arange(length1), in2)
+            counted = common & (entry < k[:, None])
+            gain = cumulative[k][:, None] - cumulative[entry]
+            metrics["rbo"][row] = (1 - p) * np.where(counted, gain, 0).sum(axis=1)
+
+            # Aligned ranks over the universe (list1, then list2-only items).
+            # list1 ranks are simply 0..U-1 in universe order; list2 ranks are
+            # positions, or tail ranks for list1 items missing from list2.
+            tail2 = lengths2[:, None] + np.cumsum(only1, axis=1) - 1
+            ranks2 = np.concatenate(
+                [
+                    np.where(common, in2, tail2),
+                    np.where(only2, np.arange(width2), -1),
+                ],
+                axis=1,
+            )
+            ranks1 = np.concatenate(
+                [
+                    np.broadcast_to(np.arange(length1), (m, length1)),
+                    length1 + np.cumsum(only2, axis=1) - 1,
+                ],
+                axis=1,
+            )
+            present = ranks2 >= 0
+            size = union.astype(float)
+
+            squared = np.where(present, (ranks1 - ranks2) ** 2, 0).sum(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                spearman = 1 - 6 * squared / (size * (size**2 - 1))
+            metrics["spearman_correlation"][row] = np.where(size > 1, spearman, np.nan)
+
+            discordant = self._discordant_pairs(ranks2, present)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                tau = 1 - 4 * discordant / (size * (size - 1))
+            tau = np.where(size > 1, tau, np.nan)
+            metrics["kendall_tau"][row] = tau
+            metrics["bubblesort_distance"][row] = (1 - tau) / 2
+
+            metrics["topk_kendall"][row] = self._topk_kendall(
+                length1, lengths2, in2, common, valid2 & (in1 >= 0), only2
+            )
+
+            # Top-k footrule: missing items sit at the location max(k1, k2).
+            location = np.maximum(length1, lengths2)[:, None]
+            footrule = np.abs(np.arange(length1) - np.where(common, in2, location)).sum(
+                axis=1
+            )
+            footrule += np.where(only2, location - np.arange(width2), 0).sum(axis=1)
+            location = location[:, 0]
+            most = (
+                (length1 + lengths2) * location
+                - length1 * (length1 - 1) // 2
+                - lengths2 * (lengths2 - 1) // 2
+            )
+            metrics["topk_footrule"][row] = np.divide(
+                footrule, most, out=np.zeros(m), where=most > 0
+            )
+
+            tokens1 = ids1.tolist()
+            for col, tokens2 in enumerate(tokens):
+                distance = edit_distance_eval(tokens1, tokens2)
+                longest = max(length1, len(tokens2))
+                metrics["edit_distance"][row, col] = distance
+                metrics["edit_distance_normalized"][row, col] = (
+                    distance / longest if longest > 0 else 0
+                )
+
+        return metrics
+
+    def _topk_kendall(
+        self,
+        length1: int,
+        lengths2: np.ndarray,
+        in2: np.ndarray,
+        common1: np.ndarray,
+        common2: np.ndarray,
+        only2: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Top-k Kendall distance of one list1 entry against every lists2 entry.
+
+        Same case analysis as ListSimilarity.topk_kendall_distance, with the
+        common items given as masks in each list's own order.
+        """
+        penalty = TOPK_KENDALL_PENALTY
+        discordant = self._discordant_pairs(in2, common1)
+
+        def missing_above(common: np.ndarray, missing: np.ndarray) -> np.ndarray:
+            below = np.cumsum(common[:, ::-1], axis=1)[:, ::-1]
+            return np.where(missing, below, 0).sum(axis=1)
+
+        intersection = common1.sum(axis=1)
+        only1_count = length1 - intersection
+        only2_count = lengths2 - intersection
+        distance = (
+            discordant
+            + missing_above(common1, ~common1)
+            + missing_above(common2, only2)
+            + only1_count * only2_count
+            + penalty
+            * (only1_count * (only1_count - 1) + only2_count * (only2_count - 1))
+            / 2
+        )
+        most = (
+            length1 * lengths2
+            + penalty * (length1 * (length1 - 1) + lengths2 * (lengths2 - 1)) / 2
         )
+        return np.divide(distance, most, out=np.zeros(len(most)), where=most > 0)
+
+    def _discordant_pairs(self, ranks: np.ndarray, present: np.ndarray) -> np.ndarray:
+        """
+        Count inversions in each row of ranks, skipping entries not present.
+
+        Universe order already sorts the first list, so every inversion of the
+        second list's ranks is a discordant pair.
+        """
+        counts = np.zeros(len(ranks), dtype=np.int64)
+        for start in range(0, len(ranks), self.chunk_size):
+            chunk = slice(start, start + self.chunk_size)
+            counts[chunk] = count_inversions(ranks[chunk], present[chunk])
+        return counts
+
+    def composite_score(self, weights=None) -> np.ndarray:
+        """
+        Compute the composite similarity score for every pair of lists.
+
+        Parameters:
+            weights: A dictionary of weights for the metrics.
+
+        Returns:
+            A matrix of composite similarity scores between 0 and 1.
+        """
+        return _composite(self.metrics, weights)
@@ -0,0 +1,60 @@
+import argparse
+import time
+from string import capwords
+
+import pandas as pd
+
+from main import normalize_titles
+
+
+# Row-by-row reference implementations, as read_lists and fix_names used to do.
+def standardize_title_rowwise(title: str) -> str:
+    return capwords(title.strip())
+
+
+def filter_alphanumeric_rowwise(input_string):
+    return "".join(char for char in input_string if char.isalnum())
+
+
+def rowwise_approach(titles: pd.Series) -> tuple[pd.Series, pd.Series]:
+    display = titles.apply(standardize_title_rowwise)
+    return display, display.apply(filter_alphanumeric_rowwise)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark title normalization against the row-by-row version."
+    )
+    parser.add_argument(
+        "--raw",
+        default="data/spotify_from_extened_data_2025_raw.csv",
+        help="path to raw extended history CSV",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=20,
+        help="how many times to replicate the raw titles",
+    )
+    args = parser.parse_args()
+
+    raw = pd.read_csv(args.raw)["master_metadata_track_name"].dropna()
+    titles = pd.concat([raw] * args.repeat, ignore_index=True)
+
+    start = time.time()
+    expected = rowwise_approach(titles)
+    rowwise_time = time.time() - start
+
+    start = time.time()
+    result = normalize_titles(titles)
+    vectorized_time = time.time() - start
+
+    assert expected[0].equals(result[0]) and expected[1].equals(result[1])
+    print(f"{len(titles)} titles ({titles.nunique()} distinct)")
+    print(f"Row by row:  {rowwise_time:.3f}s")
+    print(f"Vectorized:  {vectorized_time:.3f}s")
+    print(f"Speedup:     {rowwise_time / vectorized_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
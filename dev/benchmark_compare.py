@@ -0,0 +1,195 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from compare import COMPOSITE_METRICS, METRICS, ListSimilarity
+
+
+# Every metric in compare.METRICS, plus the composite.
+BENCHMARKS = [*METRICS, "composite_score"]
+
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000]
+
+
+def make_pair(
+    size: int, overlap: float, shuffle: float, seed: int
+) -> tuple[list[str], list[str]]:
+    """
+    Build two synthetic ranked lists of the given size.
+
+    The second list keeps an `overlap` fraction of the first list's items (the
+    rest are replaced by unseen ones) and then has a `shuffle` fraction of its
+    positions swapped at random.
+    """
+    rng = random.Random(seed)
+    first = [f"track {i}" for i in range(size)]
+    second = list(first)
+    for position in rng.sample(range(size), size - round(overlap * size)):
+        second[position] = f"other {position}"
+
+    positions = rng.sample(range(size), round(shuffle * size))
+    targets = list(positions)
+    rng.shuffle(targets)
+    values = [second[p] for p in positions]
+    for target, value in zip(targets, values):
+        second[target] = value
+    return first, second
+
+
+def time_metric(metric: str, first: list[str], second: list[str], repeat: int) -> float:
+    """
+    Best of `repeat` runs, each on a fresh instance so no cached state is shared.
+
+    Every run includes building the ListSimilarity, which interns both lists.
+    """
+    best = float("inf")
+    selected = COMPOSITE_METRICS if metric == "composite_score" else [metric]
+    for _ in range(repeat):
+        start = time.perf_counter()
+        similarity = ListSimilarity(first, second, lazy_compute=True, metrics=selected)
+        if metric == "composite_score":
+            similarity.composite_score()
+        else:
+            similarity.metric(metric)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(
+    sizes: list[int], metrics: list[str], overlap: float, shuffle: float, repeat: int
+) -> list[dict]:
+    results = []
+    for size in sizes:
+        first, second = make_pair(size, overlap, shuffle, seed=size)
+        for metric in metrics:
+            seconds = time_metric(metric, first, second, repeat)
+            results.append(
+                {
+                    "metric": metric,
+                    "size": size,
+                    "overlap": overlap,
+                    "shuffle": shuffle,
+                    "seconds": seconds,
+                }
+            )
+            print(f"{metric:<26} {size:>7} {seconds * 1000:>10.3f} ms")
+    return results
+
+
+def find_regressions(
+    results: list[dict], baseline: list[dict], threshold: float, min_seconds: float
+) -> list[str]:
+    """
+    Describe every result slower than its baseline by more than threshold.
+
+    Timings below min_seconds in both runs are treated as noise.
+    """
+
+    def key(entry: dict) -> tuple:
+        return entry["metric"], entry["size"], entry["overlap"], entry["shuffle"]
+
+    previous = {key(entry): entry["seconds"] for entry in baseline}
+    regressions = []
+    for entry in results:
+        before = previous.get(key(entry))
+        if before is None or max(before, entry["seconds"]) < min_seconds:
+            continue
+        if entry["seconds"] > before * (1 + threshold):
+            regressions.append(
+                f"{entry['metric']} at size {entry['size']}: "
+                f"{before * 1000:.3f} ms -> {entry['seconds'] * 1000:.3f} ms"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark ListSimilarity metrics on synthetic lists."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="list sizes to benchmark (default: 10 to 100000)",
+    )
+    parser.add_argument(
+        "--metrics",
+        nargs="+",
+        choices=BENCHMARKS,
+        default=BENCHMARKS,
+        help="metrics to benchmark (default: all)",
+    )
+    parser.add_argument(
+        "--overlap",
+        type=float,
+        default=0.8,
+        help="fraction of items shared by the two lists (default: 0.8)",
+    )
+    parser.add_argument(
+        "--shuffle",
+        type=float,
+        default=0.2,
+        help="fraction of positions shuffled in the second list (default: 0.2)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="runs per measurement; the fastest is kept (default: 3)",
+    )
+    parser.add_argument(
+        "--out",
+        default="bench_output.json",
+        help="where to write the results as JSON",
+    )
+    parser.add_argument(
+        "--baseline",
+        help="earlier results JSON to check for regressions",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="allowed slowdown against the baseline, as a fraction (default: 0.25)",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.001,
+        help="ignore timings below this in both runs (default: 0.001)",
+    )
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.metrics, args.overlap, args.shuffle, args.repeat)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"\nSaved results to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = find_regressions(
+            results, baseline, args.threshold, args.min_seconds
+        )
+        if regressions:
+            print(f"\nRegressions over {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,25 @@
 import argparse
+import datetime
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 
+import numpy as np
 import pandas as pd
 
 from compare import ListSimilarity
-from main import fix_names, standardize_title
+from history import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_LONG_PLAY_MS,
+    SIGNALS,
+    aggregate_plays,
+    load_history,
+    ranked_by_signal,
+    top_tracks,
+)
+from main import fix_names, normalize_titles, read_list, use_title_cache
+from play_index import DAY_NS, PlayIndex
+from title_cache import TitleCache
+from windows import ScoredWindow, WindowSearch
 
 
 @dataclass
@@ -14,50 +29,91 @@ class BestResult:
 
 
 def _normalize_spotify_list(spotify_path: str) -> pd.DataFrame:
-    spotify_df = pd.read_csv(spotify_path)
-    spotify_df["track"] = spotify_df["track"].apply(standardize_title)
-    return spotify_df[["track"]].copy()
+    return read_list(spotify_path)[["track", "stripped_track"]].copy()
+
+
+def _track_frame(names: list[str]) -> pd.DataFrame:
+    display, keys = normalize_titles(pd.Series(names, dtype=object))
+    return pd.DataFrame({"track": display, "stripped_track": keys})
 
 
 def _top_tracks_up_to(raw_df: pd.DataFrame, end_date) -> pd.DataFrame:
     filtered = raw_df[raw_df["date"] <= end_date]
-    top_tracks = filtered["master_metadata_track_name"].value_counts().head(100)
-    return pd.DataFrame({"track": [standardize_title(t) for t in top_tracks.index]})
+    counts = filtered["track"].value_counts().head(100)
+    return _track_frame(counts.index.to_list())
+
+
+def _top_tracks_streamed(raw_path: str, end_date, **filters) -> pd.DataFrame:
+    """
+    Same list as `_top_tracks_up_to`, aggregated from the raw export in chunks
+    without loading it into memory. Extra filters go to `aggregate_plays`.
+    """
+    totals = aggregate_plays(raw_path, end=end_date, **filters)
+    return _track_frame(top_tracks(totals, n=100))
+
+
+def _top_tracks_indexed(
+    index: PlayIndex, days: Iterable[int], top_n: int = 100
+) -> Iterator[tuple[datetime.date, pd.DataFrame]]:
+    """
+    Yield the top tracks up to each of the given days, from the play index.
+
+    Each date costs one lookup per track instead of a pass over the plays.
+    Ties go to the track that first appears earlier in the log's rows, which
+    matches value_counts (and --no-sweep) when the log is in time order; see
+    top_codes.
+    """
+    for day in days:
+        yield index.date(day), _track_frame(index.top_tracks(0, day, top_n))
+
+
+# CLI metric name -> ListSimilarity metric.
+SCORED_METRICS = {
+    "spearman": "spearman_correlation",
+    "kendall": "kendall_tau",
+    "rbo": "rbo",
+    "jaccard": "jaccard_similarity",
+}
 
 
 def _score_for_metric(metric: str, list1: list[str], list2: list[str]) -> float:
-    similarity = ListSimilarity(list1, list2, lazy_compute=False)
-    match metric:
-        case "spearman":
-            return similarity.spearman_correlation()
-        case "kendall":
-            return similarity.kendall_tau_distance()
-        case "rbo":
-            return similarity.rbo()
-        case "jaccard":
-            return similarity.jaccard_similarity()
-        case _:
-            raise ValueError(f"Unsupported metric: {metric}")
+    if metric not in SCORED_METRICS:
+        raise ValueError(f"Unsupported metric: {metric}")
+    name = SCORED_METRICS[metric]
+    similarity = ListSimilarity(list1, list2, metrics=[name])
+    return similarity.metrics[name]
 
 
 def find_best_end_date(
     spotify_path: str,
     raw_path: str,
     metric: str,
+    sweep: bool = True,
+    cache_dir: str | None = DEFAULT_CACHE_DIR,
 ) -> tuple[BestResult, list[tuple[pd.Timestamp, float]]]:
     spotify_df = _normalize_spotify_list(spotify_path)
+    log = load_history(raw_path, cache_dir=cache_dir)
 
-    raw_df = pd.read_csv(raw_path)
-    raw_df["ts"] = pd.to_datetime(raw_df["ts"])
-    raw_df["date"] = raw_df["ts"].dt.date
-
-    unique_dates = sorted(raw_df["date"].unique())
+    if sweep:
+        index = PlayIndex.from_log(log)
+        # Every day with a row, like --no-sweep, including days whose only
+        # plays have no track name (e.g. podcasts) and so are not indexed.
+        days = np.unique(np.asarray(log.ts) // DAY_NS) - index.first_day
+        unique_dates = [index.date(day) for day in days]
+        top_by_date = _top_tracks_indexed(index, days)
+    else:
+        raw_df = log.to_frame()
+        raw_df["date"] = raw_df["ts"].dt.date
+        unique_dates = sorted(raw_df["date"].unique())
+        top_by_date = (
+            (current_date, _top_tracks_up_to(raw_df, current_date))
+            for current_date in unique_dates
+        )
 
     best = BestResult(date=unique_dates[0], score=float("-inf"))
     scores: list[tuple[pd.Timestamp, float]] = []
 
-    for current_date in unique_dates:
-        top_df = _top_tracks_up_to(raw_df, current_date)
+    for current_date, top_df in top_by_date:
         sp_df, top_df = fix_names(spotify_df.copy(), top_df)
         score = _score_for_metric(
             metric, sp_df["track"].to_list(), top_df["track"].to_list()
@@ -69,6 +125,78 @@ def find_best_end_date(
     return best, scores
 
 
+def score_end_date_streamed(
+    spotify_path: str, raw_path: str, metric: str, end_date=None
+) -> float:
+    """
+    Score the top tracks up to end_date (all plays by default) against the
+    Spotify list, aggregated from the raw export in chunks instead of loading
+    the whole history.
+    """
+    if metric not in SCORED_METRICS:
+        raise ValueError(f"Unsupported metric: {metric}")
+    spotify_df = _normalize_spotify_list(spotify_path)
+    sp_df, top_df = fix_names(spotify_df, _top_tracks_streamed(raw_path, end_date))
+    return _score_for_metric(
+        metric, sp_df["track"].to_list(), top_df["track"].to_list()
+    )
+
+
+def find_best_windows(
+    spotify_path: str,
+    raw_path: str,
+    metric: str,
+    top: int = 5,
+    min_days: int = 1,
+    cache_dir: str | None = DEFAULT_CACHE_DIR,
+) -> list[ScoredWindow]:
+    """
+    The start and end dates whose top tracks best reproduce the Spotify list.
+    """
+    if metric not in SCORED_METRICS:
+        raise ValueError(f"Unsupported metric: {metric}")
+    spotify_df = _normalize_spotify_list(spotify_path)
+    search = WindowSearch(
+        PlayIndex.from_log(load_history(raw_path, cache_dir=cache_dir)),
+        spotify_df["track"].to_list(),
+        metric=SCORED_METRICS[metric],
+        min_days=min_days,
+    )
+    return search.search(top=top)
+
+
+def compare_signals(
+    spotify_path: str,
+    raw_path: str,
+    metrics: list[str],
+    end_date=None,
+    long_play_ms: int = DEFAULT_LONG_PLAY_MS,
+) -> dict[str, dict[str, float]]:
+    """
+    Score the top tracks under every ranking signal against the Spotify list.
+
+    The signals (see history.SIGNALS) all come from one aggregation pass over
+    the raw export, up to end_date when given.
+
+    Returns:
+        Signal -> CLI metric name -> score.
+    """
+    spotify_df = _normalize_spotify_list(spotify_path)
+    totals = aggregate_plays(raw_path, end=end_date, long_play_ms=long_play_ms)
+    scores = {}
+    for signal, tracks in ranked_by_signal(totals, n=100).items():
+        sp_df, top_df = fix_names(spotify_df.copy(), _track_frame(tracks))
+        similarity = ListSimilarity(
+            sp_df["track"].to_list(),
+            top_df["track"].to_list(),
+            metrics=[SCORED_METRICS[metric] for metric in metrics],
+        )
+        scores[signal] = {
+            metric: similarity.metrics[SCORED_METRICS[metric]] for metric in metrics
+        }
+    return scores
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Find end date that maximizes a comparison metric."
@@ -85,7 +213,7 @@ def main():
     )
     parser.add_argument(
         "--metric",
-        choices=["spearman", "kendall", "rbo", "jaccard"],
+        choices=list(SCORED_METRICS),
         default="spearman",
         help="comparison metric to maximize",
     )
@@ -95,9 +223,110 @@ def main():
         default=5,
         help="show top N dates by score",
     )
+    parser.add_argument(
+        "--no-sweep",
+        action="store_false",
+        dest="sweep",
+        help="re-aggregate the raw history for every date instead of querying "
+        "the play index",
+    )
+    parser.add_argument(
+        "--search-start",
+        action="store_true",
+        help="search the start date as well as the end date, and show the top "
+        "N windows",
+    )
+    parser.add_argument(
+        "--min-days",
+        type=int,
+        default=7,
+        help="shortest window considered by --search-start (default: 7)",
+    )
+    parser.add_argument(
+        "--signals",
+        action="store_true",
+        help="score the top tracks by play count, ms played, plays over "
+        "--long-play-ms and distinct days side by side, with every metric",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="only score the top tracks up to --end, aggregated from the raw "
+        "history in chunks instead of loading it whole",
+    )
+    parser.add_argument(
+        "--end",
+        help="last date (YYYY-MM-DD) aggregated by --signals and --stream "
+        "(default: all plays)",
+    )
+    parser.add_argument(
+        "--long-play-ms",
+        type=int,
+        default=DEFAULT_LONG_PLAY_MS,
+        help=f"shortest play counted as a long play (default: {DEFAULT_LONG_PLAY_MS})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_const",
+        const=None,
+        default=DEFAULT_CACHE_DIR,
+        dest="cache_dir",
+        help="parse the raw history instead of using the columnar cache",
+    )
+    parser.add_argument(
+        "--title-cache",
+        help="JSON file that keeps normalized titles between runs",
+    )
     args = parser.parse_args()
 
-    best, scores = find_best_end_date(args.spotify, args.raw, args.metric)
+    title_cache = TitleCache(path=args.title_cache)
+    if args.title_cache:
+        use_title_cache(title_cache)
+
+    if args.signals:
+        scores = compare_signals(
+            args.spotify,
+            args.raw,
+            list(SCORED_METRICS),
+            end_date=args.end,
+            long_play_ms=args.long_play_ms,
+        )
+        width = max(len(signal) for signal in SIGNALS)
+        print(f"{'signal':<{width}}", *(f"{m:>8}" for m in SCORED_METRICS))
+        for signal, values in scores.items():
+            print(f"{signal:<{width}}", *(f"{v:>8.4f}" for v in values.values()))
+        if args.title_cache:
+            title_cache.save()
+        return
+
+    if args.stream:
+        score = score_end_date_streamed(
+            args.spotify, args.raw, args.metric, end_date=args.end
+        )
+        print(f"{args.metric} up to {args.end or 'the last play'}: {score:.4f}")
+        if args.title_cache:
+            title_cache.save()
+        return
+
+    if args.search_start:
+        windows = find_best_windows(
+            args.spotify,
+            args.raw,
+            args.metric,
+            top=args.top_n,
+            min_days=args.min_days,
+            cache_dir=args.cache_dir,
+        )
+        print(f"Top {len(windows)} windows by {args.metric}:")
+        for window in windows:
+            print(f"{window.start} - {window.end}", f"{window.score:.4f}")
+        if args.title_cache:
+            title_cache.save()
+        return
+
+    best, scores = find_best_end_date(
+        args.spotify, args.raw, args.metric, sweep=args.sweep, cache_dir=args.cache_dir
+    )
     print(f"Best {args.metric}: {best.score:.4f} on {best.date}")
 
     top_scores = sorted(scores, key=lambda x: x[1], reverse=True)[: args.top_n]
@@ -105,6 +334,9 @@ def main():
     for date, score in top_scores:
         print(date, f"{score:.4f}")
 
+    if args.title_cache:
+        title_cache.save()
+
 
 if __name__ == "__main__":
     main()
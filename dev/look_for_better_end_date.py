@@ -1,7 +1,9 @@
 import pandas as pd
 
 from compare import ListSimilarity
+from history import load_history
 from main import read_lists
+from play_index import PlayIndex
 
 
 def main():
@@ -12,9 +14,8 @@ def main():
     spotify_list = spotify_df["track"].to_list()
     lastfm_list = lastfm_df["track"].to_list()
 
-    spotify_raw_df = pd.read_csv(spotify_raw_path)
+    index = PlayIndex.from_log(load_history(spotify_raw_path))
 
-    spotify_raw_df["timestamp"] = pd.to_datetime(spotify_raw_df["timestamp"]).dt.date
     start_date = pd.to_datetime("2024-09-01").date()
     end_date = pd.to_datetime(("2024-12-05")).date()
     current_date = start_date
@@ -22,11 +23,11 @@ def main():
     scores = []
     dates = []
     while current_date <= end_date:
-        filtered_df = spotify_raw_df[spotify_raw_df["timestamp"] <= current_date]
-        top_tracks = filtered_df["track"].value_counts().head(100)
-        top_tracks_list = top_tracks.reset_index()["track"].to_list()
+        top_tracks_list = index.top_tracks(0, index.day(current_date))
 
-        similarity = ListSimilarity(top_tracks_list, lastfm_list, lazy_compute=False)
+        similarity = ListSimilarity(
+            top_tracks_list, lastfm_list, metrics=["bubblesort_distance"]
+        )
         current_score = (
             similarity.bubblesort_distance()
         )  # TODO: which method should we use here?
@@ -41,8 +42,12 @@ def main():
     print(f"Mean: {sum(scores) / len(scores):.2f}")
     print(f"Max: {max(scores):.2f}")
 
-    final_filtered_df = spotify_raw_df[spotify_raw_df["timestamp"] <= min_date]
-    final_top_tracks = final_filtered_df["track"].value_counts().head(100)
+    final_codes = index.top(0, index.day(min_date))
+    final_top_tracks = pd.Series(
+        index.counts(0, index.day(min_date))[final_codes],
+        index=pd.Index(index.tracks[final_codes], name="track"),
+        name="count",
+    )
 
     return final_top_tracks
 
@@ -1,31 +1,270 @@
+import argparse
 import os
-from PIL import Image
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
 import pytesseract
+from PIL import Image
+
+from ocr_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, OcrCache
+from ocr_text import tracks_frame
+
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff"}
+# Phone screenshots are far larger than Tesseract needs for UI-sized text.
+DEFAULT_MAX_WIDTH = 1000
+# A single uniform block of text: skips Tesseract's page layout analysis.
+TESSERACT_CONFIG = "--psm 6"
+
+
+def list_images(folder_path: str | Path) -> list[Path]:
+    """
+    Image files in a folder, in natural order ("2.png" before "10.png").
+    """
+
+    def natural_key(path: Path) -> list:
+        return [
+            int(part) if part.isdigit() else part.lower()
+            for part in re.split(r"(\d+)", path.name)
+        ]
+
+    images = [
+        path
+        for path in Path(folder_path).iterdir()
+        if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS
+    ]
+    return sorted(images, key=natural_key)
+
+
+def preprocess(
+    image: Image.Image,
+    crop: tuple[float, float, float, float] | None = None,
+    max_width: int | None = DEFAULT_MAX_WIDTH,
+) -> Image.Image:
+    """
+    Prepare a screenshot for OCR: grayscale, crop, then downscale.
+
+    Parameters:
+        image: The screenshot.
+        crop: Optional (left, top, right, bottom) box as fractions of the image
+            size, e.g. the region holding the track list.
+        max_width: Images wider than this are scaled down to it, keeping the
+            aspect ratio; None keeps the original size.
+    """
+    image = image.convert("L")
+    if crop is not None:
+        left, top, right, bottom = crop
+        width, height = image.size
+        image = image.crop(
+            (
+                round(left * width),
+                round(top * height),
+                round(right * width),
+                round(bottom * height),
+            )
+        )
+    if max_width is not None and image.width > max_width:
+        height = round(image.height * max_width / image.width)
+        image = image.resize((max_width, height), Image.Resampling.LANCZOS)
+    return image
+
+
+def ocr_image(
+    path: str | Path,
+    crop: tuple[float, float, float, float] | None = None,
+    max_width: int | None = DEFAULT_MAX_WIDTH,
+) -> str:
+    with Image.open(path) as img:
+        return pytesseract.image_to_string(
+            preprocess(img, crop, max_width), config=TESSERACT_CONFIG
+        )
+
+
+def _ocr_or_error(path: Path, **kwargs) -> tuple[str | None, str | None]:
+    """(text, None) on success, (None, error message) otherwise."""
+    try:
+        return ocr_image(path, **kwargs), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _init_worker() -> None:
+    # Each worker already runs one Tesseract at a time; letting every one of
+    # them spawn a thread per core only oversubscribes the CPU.
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def ocr_settings(
+    crop: tuple[float, float, float, float] | None, max_width: int | None
+) -> dict:
+    """Everything besides the image itself that changes the OCR output."""
+    return {
+        "tesseract": str(pytesseract.get_tesseract_version()),
+        "config": TESSERACT_CONFIG,
+        "crop": list(crop) if crop is not None else None,
+        "max_width": max_width,
+    }
+
+
+def extract_text_from_images(
+    folder_path: str | Path,
+    jobs: int = 1,
+    crop: tuple[float, float, float, float] | None = None,
+    max_width: int | None = DEFAULT_MAX_WIDTH,
+    cache: OcrCache | None = None,
+) -> dict[str, str]:
+    """
+    OCR every image in a folder, optionally over a pool of jobs processes.
+
+    With a cache, images whose content was already read with the same settings
+    are served from it and only new or changed images are OCRed.
+
+    Returns:
+        Filename -> extracted text, in natural filename order. Images that
+        fail are reported and left out.
+    """
+    paths = list_images(folder_path)
+    texts: dict[Path, str] = {}
+    keys: dict[Path, str] = {}
+    if cache is not None:
+        settings = ocr_settings(crop, max_width)
+        for path in paths:
+            keys[path] = cache.key(path, settings)
+            text = cache.get(keys[path])
+            if text is not None:
+                texts[path] = text
+
+    pending = [path for path in paths if path not in texts]
+    ocr = partial(_ocr_or_error, crop=crop, max_width=max_width)
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(pending)), initializer=_init_worker
+        ) as pool:
+            outcomes = list(pool.map(ocr, pending))
+    else:
+        outcomes = [ocr(path) for path in pending]
+
+    for path, (text, error) in zip(pending, outcomes):
+        if error is not None:
+            print(f"Error processing {path.name}: {error}")
+            continue
+        texts[path] = text
+        if cache is not None:
+            cache.put(keys[path], text)
+
+    return {path.name: texts[path] for path in paths if path in texts}
 
 
-def extract_text_from_images(folder_path: str) -> dict[str, str]:
-    results = {}
+def main(
+    folder_path: str,
+    csv_path: str,
+    text_path: str | None = None,
+    jobs: int = 1,
+    crop: tuple[float, float, float, float] | None = None,
+    max_width: int | None = DEFAULT_MAX_WIDTH,
+    cache_dir: str | None = DEFAULT_CACHE_DIR,
+    cache_size: int = DEFAULT_MAX_BYTES,
+    clear_cache: bool = False,
+) -> None:
+    cache = OcrCache(cache_dir, max_bytes=cache_size) if cache_dir else None
+    if cache is not None and clear_cache:
+        cache.clear()
 
-    for filename in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, filename)
-        if os.path.isfile(file_path):
-            try:
-                with Image.open(file_path) as img:
-                    text: str = pytesseract.image_to_string(img)
-                    results[filename] = text
-            except Exception as e:
-                print(f"Error processing {filename}: {e}")
+    texts = extract_text_from_images(
+        folder_path, jobs=jobs, crop=crop, max_width=max_width, cache=cache
+    )
+    if cache is not None:
+        print(f"OCR cache: {cache.hits} reused, {cache.misses} new or changed")
 
-    return results
+    if text_path:
+        with open(text_path, "w", encoding="utf-8") as f:
+            for image, text in texts.items():
+                f.write(f"--- {image} ---\n")
+                f.write(text + "\n\n")
+        print(f"Saved raw text to {text_path}")
 
+    frame = tracks_frame(texts)
+    frame.to_csv(csv_path, index=False)
+    print(f"Extracted {len(frame)} tracks from {len(texts)} images to {csv_path}")
 
-folder_path = "./spotify-screenshots/"
-text_results = extract_text_from_images(folder_path)
 
-output_file = os.path.join(folder_path, "extracted_texts.txt")
-with open(output_file, "w", encoding="utf-8") as f:
-    for image, text in text_results.items():
-        f.write(f"--- {image} ---\n")
-        f.write(text + "\n\n")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Extract a top-tracks list from Spotify Wrapped screenshots."
+    )
+    parser.add_argument(
+        "folder",
+        nargs="?",
+        default="./spotify-screenshots/",
+        help="folder with the screenshots (default: ./spotify-screenshots/)",
+    )
+    parser.add_argument(
+        "-o",
+        "--out-csv",
+        default="extracted_tracks.csv",
+        help="where to write the track/artist CSV (default: extracted_tracks.csv)",
+    )
+    parser.add_argument(
+        "--text",
+        help="also save the raw OCR text of every image to this file",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of OCR worker processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--crop",
+        type=float,
+        nargs=4,
+        metavar=("LEFT", "TOP", "RIGHT", "BOTTOM"),
+        help="region holding the track list, as fractions of the image size",
+    )
+    parser.add_argument(
+        "--max-width",
+        type=int,
+        default=DEFAULT_MAX_WIDTH,
+        help=f"downscale wider images to this width (default: {DEFAULT_MAX_WIDTH}; "
+        "0 keeps the original size)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"where OCR results are cached (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_const",
+        const=None,
+        dest="cache_dir",
+        help="OCR every image, without reading or writing the cache",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="drop all cached OCR results before running",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="cache size limit in MiB; least recently used results are evicted "
+        f"first (default: {DEFAULT_MAX_BYTES // (1024 * 1024)})",
+    )
+    args = parser.parse_args()
 
-print(f"Text extraction completed. Results saved to {output_file}")
+    main(
+        folder_path=args.folder,
+        csv_path=args.out_csv,
+        text_path=args.text,
+        jobs=args.jobs,
+        crop=tuple(args.crop) if args.crop else None,
+        max_width=args.max_width or None,
+        cache_dir=args.cache_dir,
+        cache_size=args.cache_size * 1024 * 1024,
+        clear_cache=args.clear_cache,
+    )
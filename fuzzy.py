@@ -0,0 +1,64 @@
+from collections import defaultdict
+from collections.abc import Iterable
+from itertools import pairwise
+
+from editdistance import eval as edit_distance_eval
+
+
+class TitleIndex:
+    def __init__(self, titles: Iterable[str], max_distance: int = 2):
+        """
+        Index titles for near-duplicate lookup within an edit distance bound.
+
+        Each title is split into max_distance + 1 segments. If two strings are
+        within max_distance edits, at least one segment of the indexed title
+        survives untouched and appears in the query shifted by at most
+        max_distance characters. Lookups therefore only probe a handful of
+        (length, segment) keys and verify the few candidates found, instead of
+        computing the edit distance against every title.
+
+        Parameters:
+            titles: The titles to index; duplicates are ignored.
+            max_distance: The largest edit distance reported by lookups.
+        """
+        self.max_distance = max_distance
+        self.titles = list(dict.fromkeys(titles))
+        self._segments: dict[tuple[int, int, str], list[int]] = defaultdict(list)
+        for idx, title in enumerate(self.titles):
+            for segment, (start, size) in enumerate(self._partition(len(title))):
+                key = (len(title), segment, title[start : start + size])
+                self._segments[key].append(idx)
+
+    def _partition(self, length: int) -> list[tuple[int, int]]:
+        """(start, size) of each segment of a string of the given length."""
+        parts = self.max_distance + 1
+        bounds = [length * i // parts for i in range(parts + 1)]
+        return [(start, end - start) for start, end in pairwise(bounds)]
+
+    def query(self, title: str) -> list[tuple[str, int]]:
+        """
+        All indexed titles within max_distance of title, closest first.
+
+        Ties keep the order in which titles were indexed.
+        """
+        k = self.max_distance
+        candidates: set[int] = set()
+        for length in range(max(len(title) - k, 0), len(title) + k + 1):
+            for segment, (start, size) in enumerate(self._partition(length)):
+                first = max(start - k, 0)
+                last = min(start + k, len(title) - size)
+                for pos in range(first, last + 1):
+                    key = (length, segment, title[pos : pos + size])
+                    candidates.update(self._segments.get(key, ()))
+
+        matches = []
+        for idx in sorted(candidates):
+            distance = edit_distance_eval(title, self.titles[idx])
+            if distance <= k:
+                matches.append((distance, idx))
+        return [(self.titles[idx], distance) for distance, idx in sorted(matches)]
+
+    def nearest(self, title: str) -> tuple[str, int] | None:
+        """The closest indexed title and its distance, or None if none is close."""
+        matches = self.query(title)
+        return matches[0] if matches else None
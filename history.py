@@ -0,0 +1,385 @@
+import datetime
+import hashlib
+import json
+import os
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_CACHE_DIR = ".cache/history"
+CACHE_VERSION = 1
+DEFAULT_CHUNKSIZE = 100_000
+# Spotify counts a stream once it has played for 30 seconds.
+DEFAULT_LONG_PLAY_MS = 30_000
+
+# Per-track ranking signals aggregate_plays computes, in one pass.
+SIGNALS = ("plays", "ms_played", "long_plays", "days")
+
+# Canonical column -> accepted names in the different Spotify exports.
+COLUMN_ALIASES = {
+    "ts": ("ts", "timestamp", "endTime"),
+    "track": ("master_metadata_track_name", "track", "trackName"),
+    "artist": ("master_metadata_album_artist_name", "artist", "artistName"),
+    "ms_played": ("ms_played", "msPlayed"),
+    "skipped": ("skipped",),
+}
+
+_ARRAY_COLUMNS = ("ts", "track_codes", "artist_codes", "ms_played", "skipped")
+
+
+@dataclass
+class PlayLog:
+    """
+    Columnar view of a raw listening history, one entry per play.
+
+    Track and artist names are dictionary-encoded: `track_codes` indexes into
+    `tracks` (-1 when the name is missing), likewise for artists. Timestamps are
+    int64 nanoseconds since the epoch (UTC). Rows keep the order of the source.
+    """
+
+    ts: np.ndarray
+    track_codes: np.ndarray
+    tracks: np.ndarray
+    artist_codes: np.ndarray
+    artists: np.ndarray
+    ms_played: np.ndarray
+    skipped: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Decode the log into a DataFrame with ts, track, artist, ms_played and
+        skipped columns; missing names become NaN.
+        """
+        return pd.DataFrame(
+            {
+                "ts": pd.to_datetime(np.asarray(self.ts), unit="ns", utc=True),
+                "track": _decode(self.track_codes, self.tracks),
+                "artist": _decode(self.artist_codes, self.artists),
+                "ms_played": np.asarray(self.ms_played),
+                "skipped": np.asarray(self.skipped),
+            }
+        )
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "PlayLog":
+        """
+        Encode a raw export (CSV or JSON records) into a PlayLog.
+        """
+        df = _canonical_columns(df)
+        track_codes, tracks = pd.factorize(df["track"])
+        artist_codes, artists = pd.factorize(df["artist"])
+        ts = pd.to_datetime(df["ts"], utc=True, format="ISO8601").dt.as_unit("ns")
+        return cls(
+            ts=ts.astype("int64").to_numpy(),
+            track_codes=track_codes.astype(np.int32),
+            tracks=np.asarray(tracks, dtype=object),
+            artist_codes=artist_codes.astype(np.int32),
+            artists=np.asarray(artists, dtype=object),
+            ms_played=df["ms_played"].fillna(0).astype(np.int64).to_numpy(),
+            skipped=df["skipped"].fillna(False).astype(bool).to_numpy(),
+        )
+
+    @classmethod
+    def concat(cls, logs: list["PlayLog"]) -> "PlayLog":
+        """
+        Join several logs, merging their name dictionaries.
+        """
+        if len(logs) == 1:
+            return logs[0]
+
+        def merge(codes_name: str, names_name: str) -> tuple[np.ndarray, np.ndarray]:
+            lookup: dict = {}
+            parts = []
+            for log in logs:
+                names = getattr(log, names_name)
+                remap = np.array(
+                    [lookup.setdefault(name, len(lookup)) for name in names] + [-1],
+                    dtype=np.int32,
+                )
+                parts.append(remap[getattr(log, codes_name)])
+            return np.concatenate(parts), np.array(list(lookup), dtype=object)
+
+        track_codes, tracks = merge("track_codes", "tracks")
+        artist_codes, artists = merge("artist_codes", "artists")
+        return cls(
+            ts=np.concatenate([log.ts for log in logs]),
+            track_codes=track_codes,
+            tracks=tracks,
+            artist_codes=artist_codes,
+            artists=artists,
+            ms_played=np.concatenate([log.ms_played for log in logs]),
+            skipped=np.concatenate([log.skipped for log in logs]),
+        )
+
+
+def _decode(codes: np.ndarray, names: np.ndarray) -> np.ndarray:
+    decoded = np.append(names, np.nan).astype(object)
+    return decoded[np.asarray(codes)]
+
+
+def _canonical_columns(df: pd.DataFrame) -> pd.DataFrame:
+    columns = {}
+    for canonical, aliases in COLUMN_ALIASES.items():
+        source = next((name for name in aliases if name in df.columns), None)
+        if source is not None:
+            columns[canonical] = df[source]
+        elif canonical in ("ts", "track"):
+            raise ValueError(f"History has no {canonical} column (tried {aliases})")
+        else:
+            columns[canonical] = pd.Series(np.nan, index=df.index)
+    return pd.DataFrame(columns)
+
+
+def read_raw_history(path: str | Path) -> pd.DataFrame:
+    """
+    Parse one raw export: a CSV file or a Spotify JSON list of play records.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".json":
+        with open(path, encoding="utf-8") as f:
+            return pd.DataFrame(json.load(f))
+    return pd.read_csv(path)
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_entry(path: Path, cache_dir: Path) -> Path:
+    key = hashlib.sha256(str(path.resolve()).encode()).hexdigest()[:12]
+    return cache_dir / f"{path.stem}-{key}"
+
+
+def _read_cached(entry: Path, path: Path) -> PlayLog | None:
+    """
+    Return the cached log for path if it is still valid, otherwise None.
+
+    A matching size and mtime is trusted as is; when only the mtime changed,
+    the content hash decides and the manifest is refreshed on a match.
+    """
+    manifest_path = entry / "manifest.json"
+    if not manifest_path.exists():
+        return None
+    manifest = json.loads(manifest_path.read_text())
+    stat = path.stat()
+    if manifest.get("version") != CACHE_VERSION or manifest["size"] != stat.st_size:
+        return None
+    if manifest["mtime_ns"] != stat.st_mtime_ns:
+        if manifest["sha256"] != _file_digest(path):
+            return None
+        manifest["mtime_ns"] = stat.st_mtime_ns
+        manifest_path.write_text(json.dumps(manifest))
+
+    arrays = {
+        name: np.load(entry / f"{name}.npy", mmap_mode="r") for name in _ARRAY_COLUMNS
+    }
+    names = {
+        name: np.array(
+            json.loads((entry / f"{name}.json").read_text(encoding="utf-8")),
+            dtype=object,
+        )
+        for name in ("tracks", "artists")
+    }
+    return PlayLog(**arrays, **names)
+
+
+def _write_cache(entry: Path, path: Path, log: PlayLog) -> None:
+    entry.mkdir(parents=True, exist_ok=True)
+    (entry / "manifest.json").unlink(missing_ok=True)
+    for name in _ARRAY_COLUMNS:
+        np.save(entry / f"{name}.npy", getattr(log, name))
+    for name in ("tracks", "artists"):
+        (entry / f"{name}.json").write_text(
+            json.dumps(getattr(log, name).tolist(), ensure_ascii=False),
+            encoding="utf-8",
+        )
+    stat = path.stat()
+    manifest = {
+        "version": CACHE_VERSION,
+        "source": str(path.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": _file_digest(path),
+    }
+    # Written last, so an interrupted write never looks like a valid entry.
+    (entry / "manifest.json").write_text(json.dumps(manifest))
+
+
+def load_history(
+    paths: str | Path | list[str | Path],
+    cache_dir: str | Path | None = DEFAULT_CACHE_DIR,
+) -> PlayLog:
+    """
+    Load one or more raw history exports as a single PlayLog.
+
+    Each source is parsed once and stored as typed columns under cache_dir;
+    later loads memory-map the cached columns instead of parsing the source
+    again. Pass cache_dir=None to always parse.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+
+    logs = []
+    for path in map(Path, paths):
+        if cache_dir is None:
+            logs.append(PlayLog.from_frame(read_raw_history(path)))
+            continue
+        entry = _cache_entry(path, Path(cache_dir))
+        log = _read_cached(entry, path)
+        if log is None:
+            log = PlayLog.from_frame(read_raw_history(path))
+            _write_cache(entry, path, log)
+        logs.append(log)
+    return PlayLog.concat(logs)
+
+
+def iter_history_chunks(
+    paths: str | Path | list[str | Path], chunksize: int = DEFAULT_CHUNKSIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the raw history in chunks of at most chunksize plays.
+
+    Chunks carry the canonical columns (ts, track, artist, ms_played, skipped)
+    and keep a running row index across files, so row order is preserved.
+    CSV files are read incrementally; JSON exports are read one file at a time,
+    which is how Spotify already splits them.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+
+    offset = 0
+    for path in map(Path, paths):
+        if path.suffix.lower() == ".json":
+            records = read_raw_history(path)
+            frames = (
+                records.iloc[start : start + chunksize]
+                for start in range(0, len(records), chunksize)
+            )
+        else:
+            frames = pd.read_csv(path, chunksize=chunksize)
+        for frame in frames:
+            chunk = _canonical_columns(frame)
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+
+
+def _day_bound(day) -> pd.Timestamp:
+    return pd.Timestamp(day).tz_localize(None).tz_localize("UTC").normalize()
+
+
+def aggregate_plays(
+    paths: str | Path | list[str | Path],
+    start: datetime.date | str | None = None,
+    end: datetime.date | str | None = None,
+    min_ms_played: int = 0,
+    include_skipped: bool = True,
+    long_play_ms: int = DEFAULT_LONG_PLAY_MS,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> pd.DataFrame:
+    """
+    Aggregate per-track ranking signals in bounded memory.
+
+    The history is streamed chunk by chunk and only the running per-track totals
+    are kept, so memory grows with the number of distinct tracks (and, for the
+    distinct days, track-days) rather than the number of plays. Every signal in
+    SIGNALS comes out of the same pass:
+
+    - plays: the number of plays.
+    - ms_played: the total time played.
+    - long_plays: the number of plays of at least long_play_ms.
+    - days: the number of distinct UTC days with a play.
+
+    Parameters:
+        paths: One or more raw history exports.
+        start, end: Optional inclusive date window (UTC calendar days).
+        min_ms_played: Drop plays shorter than this.
+        include_skipped: If False, drop plays marked as skipped.
+        long_play_ms: Shortest play counted by long_plays.
+        chunksize: Number of plays parsed at a time.
+
+    Returns:
+        A DataFrame indexed by track with a column per signal, ordered by plays
+        like value_counts: descending, ties by first appearance.
+    """
+    totals = pd.DataFrame(
+        {"plays": [], "ms_played": [], "long_plays": [], "first_seen": []},
+        index=pd.Index([], name="track"),
+    )
+    track_days = pd.DataFrame({"track": [], "day": []})
+    for chunk in iter_history_chunks(paths, chunksize=chunksize):
+        keep = chunk["track"].notna()
+        ts = pd.to_datetime(chunk["ts"], utc=True, format="ISO8601")
+        if start is not None:
+            keep &= ts >= _day_bound(start)
+        if end is not None:
+            keep &= ts < _day_bound(end) + pd.Timedelta(days=1)
+        ms_played = chunk["ms_played"].fillna(0)
+        if min_ms_played:
+            keep &= ms_played >= min_ms_played
+        if not include_skipped:
+            keep &= ~chunk["skipped"].fillna(False).astype(bool)
+
+        played = chunk[keep].assign(
+            first_seen=chunk.index[keep],
+            long_plays=ms_played[keep] >= long_play_ms,
+            day=ts[keep].dt.floor("D"),
+        )
+        partial = played.groupby("track", sort=False).agg(
+            plays=("track", "size"),
+            ms_played=("ms_played", "sum"),
+            long_plays=("long_plays", "sum"),
+            first_seen=("first_seen", "min"),
+        )
+        totals = (
+            pd.concat([totals, partial])
+            .groupby(level=0, sort=False)
+            .agg(
+                {
+                    "plays": "sum",
+                    "ms_played": "sum",
+                    "long_plays": "sum",
+                    "first_seen": "min",
+                }
+            )
+        )
+        # A track-day can span chunks, so distinct days are only counted at
+        # the end, from the distinct pairs seen so far.
+        track_days = pd.concat(
+            [track_days, played[["track", "day"]].drop_duplicates()]
+        ).drop_duplicates()
+
+    totals["days"] = track_days.groupby("track", sort=False).size()
+    totals = totals.sort_values(["plays", "first_seen"], ascending=[False, True])
+    totals.index.name = "track"
+    return totals[list(SIGNALS)].astype(np.int64)
+
+
+def top_tracks(totals: pd.DataFrame, n: int = 100, by: str = "plays") -> list[str]:
+    """
+    The raw names of the n highest-ranked tracks of an aggregate, by one of
+    its signals.
+
+    Ties keep the aggregate's order, i.e. first appearance in the history.
+    """
+    return (
+        totals[by].sort_values(ascending=False, kind="stable").head(n).index.to_list()
+    )
+
+
+def ranked_by_signal(
+    totals: pd.DataFrame, n: int = 100, signals: tuple[str, ...] = SIGNALS
+) -> dict[str, list[str]]:
+    """The top n tracks of an aggregate under each signal, keyed by signal."""
+    return {signal: top_tracks(totals, n=n, by=signal) for signal in signals}
@@ -1,8 +1,13 @@
 import argparse
+import re
 from string import capwords
 import pandas as pd
-from compare import ListSimilarity
+from compare import COMPOSITE_METRICS, METRICS, ListSimilarity
+from fuzzy import TitleIndex
 import plots
+import profiling
+from profiling import Profiler
+from title_cache import TitleCache
 
 
 def standardize_title(title: str) -> str:
@@ -10,39 +15,150 @@ def standardize_title(title: str) -> str:
     return capwords(title.strip())
 
 
-def read_lists(first_path: str, second_path: str) -> tuple[pd.DataFrame, pd.DataFrame]:
-    sdf = pd.read_csv(first_path)
-    ldf = pd.read_csv(second_path)
+# Matches exactly the characters for which str.isalnum() is False.
+_NON_ALPHANUMERIC = re.compile(r"[\W_]+")
 
-    sdf["track"] = sdf["track"].apply(standardize_title)
-    ldf["track"] = ldf["track"].apply(standardize_title)
 
-    sdf, ldf = fix_names(sdf, ldf)
+def _expand(values: list, codes, titles: pd.Series) -> pd.Series:
+    """Map per-unique values back onto the rows of titles (code -1 is missing)."""
+    lookup = pd.Index([*values, None], dtype=object)
+    return pd.Series(lookup.take(codes), index=titles.index, name=titles.name).astype(
+        titles.dtype
+    )
 
-    return sdf, ldf
 
+_title_cache = TitleCache()
 
-def filter_alphanumeric(input_string):
-    return "".join(char for char in input_string if char.isalnum())
 
+def use_title_cache(cache: TitleCache) -> None:
+    """Replace the process-wide cache used by normalize_titles."""
+    global _title_cache
+    _title_cache = cache
 
-def fix_names(first_df, second_df):
-    first_df["stripped_track"] = first_df["track"].apply(filter_alphanumeric)
-    second_df["stripped_track"] = second_df["track"].apply(filter_alphanumeric)
 
-    convert_dict = (
-        second_df[["track", "stripped_track"]]
-        .merge(
-            first_df[["track", "stripped_track"]],
-            on="stripped_track",
-            suffixes=("_second", "_first"),
-        )
-        .drop("stripped_track", axis=1)
-        .set_index("track_second")
-        .to_dict()["track_first"]
+def _normalize_uncached(titles: list[str]) -> list[tuple[str, str]]:
+    display = pd.Index([standardize_title(title) for title in titles], dtype=object)
+    keys = display.str.replace(_NON_ALPHANUMERIC, "", regex=True)
+    return list(zip(display, keys))
+
+
+def normalize_titles(
+    titles: pd.Series, cache: TitleCache | None = None
+) -> tuple[pd.Series, pd.Series]:
+    """
+    Standardize titles and derive their alphanumeric matching keys in one pass.
+
+    Gives the same results as applying standardize_title and then
+    filter_alphanumeric row by row, but each distinct title is handled once and
+    the keys are stripped with a single vectorized regex. Results are memoized in
+    cache (the process-wide title cache by default), so titles seen before are
+    not normalized again. Missing titles stay missing.
+    """
+    codes, uniques = pd.factorize(titles)
+    cache = _title_cache if cache is None else cache
+    entries = cache.normalize_many(uniques, _normalize_uncached)
+    display = [entry[0] for entry in entries]
+    keys = [entry[1] for entry in entries]
+    return _expand(display, codes, titles), _expand(keys, codes, titles)
+
+
+def title_keys(titles: pd.Series) -> pd.Series:
+    """Vectorized filter_alphanumeric over a Series of titles."""
+    codes, uniques = pd.factorize(titles)
+    keys = pd.Index(uniques, dtype=object).str.replace(
+        _NON_ALPHANUMERIC, "", regex=True
+    )
+    return _expand(keys, codes, titles)
+
+
+def read_list(path: str, depth: int | None = None) -> pd.DataFrame:
+    """
+    Read a single CSV list and standardize its track titles.
+
+    With a depth, only the first `depth` rows are parsed.
+    """
+    with profiling.stage("read_csv"):
+        df = pd.read_csv(path, nrows=depth)
+    with profiling.stage("normalize_titles"):
+        df["track"], df["stripped_track"] = normalize_titles(df["track"])
+    return df
+
+
+def read_lists(
+    first_path: str, second_path: str, match: str = "exact", depth: int | None = None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    sdf = read_list(first_path, depth=depth)
+    ldf = read_list(second_path, depth=depth)
+
+    sdf, ldf = fix_names(sdf, ldf, match=match)
+
+    return sdf, ldf
+
+
+def filter_alphanumeric(input_string):
+    return _NON_ALPHANUMERIC.sub("", input_string)
+
+
+MATCH_MODES = ("exact", "fuzzy")
+FUZZY_MAX_DISTANCE = 2
+# Keys need this many characters per allowed edit; short titles that differ by
+# a couple of letters are usually different songs.
+FUZZY_CHARS_PER_EDIT = 5
+
+
+def fuzzy_matches(
+    first_df, second_df, max_distance: int = FUZZY_MAX_DISTANCE
+) -> dict[str, str]:
+    """
+    Map second titles whose key has no exact match to the nearest first title.
+
+    Keys are compared by edit distance through a TitleIndex, so each lookup
+    only verifies a few candidates instead of scanning every first title. A key
+    may be at most one edit away per FUZZY_CHARS_PER_EDIT characters, and never
+    more than max_distance.
+    """
+    first_keys = first_df.drop_duplicates("stripped_track")
+    key_to_track = dict(zip(first_keys["stripped_track"], first_keys["track"]))
+    index = TitleIndex(
+        (key for key in key_to_track if isinstance(key, str)), max_distance
     )
 
-    second_df["track"] = second_df["track"].replace(convert_dict)
+    matches = {}
+    for track, key in zip(second_df["track"], second_df["stripped_track"]):
+        if not isinstance(key, str) or key in key_to_track:
+            continue
+        allowed = min(max_distance, len(key) // FUZZY_CHARS_PER_EDIT)
+        nearest = index.nearest(key) if allowed > 0 else None
+        if nearest is not None and nearest[1] <= allowed:
+            matches[track] = key_to_track[nearest[0]]
+    return matches
+
+
+def fix_names(first_df, second_df, match: str = "exact"):
+    if match not in MATCH_MODES:
+        raise ValueError(f"Unsupported match mode: {match}")
+
+    with profiling.stage("match_titles"):
+        # Frames from read_list already carry their keys.
+        for df in (first_df, second_df):
+            if "stripped_track" not in df:
+                df["stripped_track"] = title_keys(df["track"])
+
+        convert_dict = (
+            second_df[["track", "stripped_track"]]
+            .merge(
+                first_df[["track", "stripped_track"]],
+                on="stripped_track",
+                suffixes=("_second", "_first"),
+            )
+            .drop("stripped_track", axis=1)
+            .set_index("track_second")
+            .to_dict()["track_first"]
+        )
+        if match == "fuzzy":
+            convert_dict.update(fuzzy_matches(first_df, second_df))
+
+        second_df["track"] = second_df["track"].replace(convert_dict)
 
     return first_df, second_df
 
@@ -102,28 +218,53 @@ def main(
     print_diff=False,
     plot_top_chart=False,
     rbo_p=0.9,
+    title_cache_path=None,
+    match="exact",
+    profile=None,
+    metrics=None,
+    depth=None,
+    plot_path=None,
 ):
-    first_df, second_df = read_lists(first_path, second_path)
+    profiler = Profiler() if profile else None
+    profiling.activate(profiler)
+    if title_cache_path:
+        use_title_cache(TitleCache(path=title_cache_path))
+
+    first_df, second_df = read_lists(first_path, second_path, match=match, depth=depth)
+
+    if title_cache_path:
+        _title_cache.save()
 
     first_list = first_df["track"].to_list()
     second_list = second_df["track"].to_list()
 
     if print_sim_score:
         similarity = ListSimilarity(
-            first_list, second_list, rbo_p=rbo_p, lazy_compute=False
+            first_list,
+            second_list,
+            rbo_p=rbo_p,
+            lazy_compute=False,
+            profiler=profiler,
+            metrics=metrics,
+            depth=depth,
         )
         for metric, score in similarity.metrics.items():
             print(f"{metric}: {score:.3f}")
 
-        composite = similarity.composite_score()
-        print(f"\nComposite Score: {round(100 * composite)}%")
+        if set(COMPOSITE_METRICS) <= set(similarity.selected):
+            composite = similarity.composite_score()
+            print(f"\nComposite Score: {round(100 * composite)}%")
+
+    if profiler is not None:
+        print(f"\n{profiler.report(profile)}")
+        profiling.activate(None)
 
     if print_diff:
         print_diffs(
             first_list, second_list, first_name=first_title, second_name=second_title
         )
 
-    if plot_top_chart:
+    if plot_top_chart or plot_path:
         plots.connection_graph(
             first_list,
             second_list,
@@ -132,7 +273,10 @@ def main(
             list2_title=second_title,
             main_title="Top Tracks According to\n\n",
             xkcd=False,  # should the plot be in XKCD style or not
+            output=plot_path,
         )
+        if plot_path:
+            print(f"Saved connection graph to {plot_path}")
 
 
 if __name__ == "__main__":
@@ -183,12 +327,52 @@ if __name__ == "__main__":
         dest="plot_top_chart",
         help="generate connection graph visualization",
     )
+    parser.add_argument(
+        "--plot-out",
+        type=str,
+        dest="plot_path",
+        help="save the connection graph to this PNG or SVG file instead of "
+        "showing it (works without a display)",
+    )
     parser.add_argument(
         "--rbo-p",
         type=float,
         default=0.9,
         help="RBO similarity parameter p (default: 0.9)",
     )
+    parser.add_argument(
+        "--title-cache",
+        type=str,
+        help="JSON file that keeps normalized titles between runs",
+    )
+    parser.add_argument(
+        "--match",
+        choices=MATCH_MODES,
+        default="exact",
+        help="how titles are matched across lists: exact alphanumeric keys, or also "
+        "near-duplicate titles a few edits apart (default: exact)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="table",
+        choices=["table", "json"],
+        help="report wall time and call counts of every normalization stage and "
+        "metric, as a table (default) or JSON",
+    )
+    parser.add_argument(
+        "--metrics",
+        nargs="+",
+        choices=list(METRICS),
+        help="only compute these metrics (default: all); the composite score is "
+        "shown when all of its inputs are selected",
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        help="only compare the top K tracks of each list; items missing from "
+        "one head are handled by the top-k Kendall and footrule metrics",
+    )
     args = parser.parse_args()
 
     main(
@@ -200,4 +384,10 @@ if __name__ == "__main__":
         print_diff=args.print_diff,
         plot_top_chart=args.plot_top_chart,
         rbo_p=args.rbo_p,
+        title_cache_path=args.title_cache,
+        match=args.match,
+        profile=args.profile,
+        metrics=args.metrics,
+        depth=args.depth,
+        plot_path=args.plot_path,
     )
@@ -1,10 +1,18 @@
 import argparse
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 import pandas as pd
 
 import plots
-from compare import ListSimilarity
-from main import read_lists
+import profiling
+from compare import COMPOSITE_METRICS, METRICS, ListSimilarity
+from main import MATCH_MODES, fix_names, read_list, use_title_cache
+from profiling import Profiler
+from ranked_list import RankedList
+from title_cache import TitleCache
 
 
 COLUMNS = [
@@ -16,36 +24,174 @@ COLUMNS = [
     ("spearman_correlation", "Spearman"),
     ("jaccard_similarity", "Jaccard"),
     ("rbo", "RBO"),
+    ("topk_kendall", "Top-k Kendall"),
+    ("topk_footrule", "Top-k Footrule"),
+    ("rank_based_edit_distance", "Rank Edit"),
     ("composite_score", "Composite"),
     ("composite_percent", "Composite %"),
 ]
 
 
 def compare_pair(
-    first_path: str, second_path: str, rbo_p: float
+    first_path: str,
+    second_path: str,
+    rbo_p: float,
+    match: str = "exact",
+    metrics: list[str] | None = None,
+    depth: int | None = None,
 ) -> tuple[dict, list[str], list[str]]:
-    first_df, second_df = read_lists(first_path, second_path)
+    return compare_to_reference(
+        read_list(first_path, depth=depth),
+        second_path,
+        rbo_p,
+        match,
+        metrics=metrics,
+        depth=depth,
+    )
+
+
+def compare_to_reference(
+    reference_df: pd.DataFrame,
+    second_path: str,
+    rbo_p: float,
+    match: str = "exact",
+    profiler: Profiler | None = None,
+    metrics: list[str] | None = None,
+    depth: int | None = None,
+    reference: RankedList | None = None,
+) -> tuple[dict, list[str], list[str]]:
+    """
+    Compare an already read and normalized reference list against one CSV.
+
+    Only the selected metrics are computed (all by default); the composite is
+    included when every metric it combines is selected. With a depth, every
+    metric only looks at the top `depth` tracks of each list. Pass the
+    reference tracks already encoded as `reference` to reuse that encoding
+    across comparisons.
+    """
+    first_df, second_df = fix_names(
+        reference_df.head(depth).copy(),
+        read_list(second_path, depth=depth),
+        match=match,
+    )
 
+    # Matching only renames titles of the second list.
+    if reference is None:
+        reference = RankedList(first_df["track"], vocabulary={})
     first_list = first_df["track"].to_list()
     second_list = second_df["track"].to_list()
 
-    similarity = ListSimilarity(first_list, second_list, rbo_p=rbo_p, lazy_compute=False)
-    metrics = dict(similarity.metrics)
-    composite = similarity.composite_score()
+    similarity = ListSimilarity(
+        reference,
+        second_list,
+        rbo_p=rbo_p,
+        lazy_compute=False,
+        profiler=profiler,
+        metrics=metrics,
+        depth=depth,
+    )
+    scores = dict(similarity.metrics)
+    if set(COMPOSITE_METRICS) <= set(similarity.selected):
+        composite = similarity.composite_score()
+        scores["composite_score"] = composite
+        scores["composite_percent"] = composite * 100
+    scores["second"] = str(second_path)
+    return scores, first_list, second_list
+
+
+_worker_reference: pd.DataFrame | None = None
+_worker_ranked: RankedList | None = None
+_worker_title_cache: TitleCache | None = None
+
+
+def _init_worker(reference_df: pd.DataFrame, title_cache_path: str | None) -> None:
+    """Store and encode the reference list once per worker process."""
+    global _worker_reference, _worker_ranked, _worker_title_cache
+    _worker_reference = reference_df
+    _worker_ranked = RankedList(reference_df["track"], vocabulary={})
+    if title_cache_path:
+        _worker_title_cache = TitleCache(path=title_cache_path)
+        use_title_cache(_worker_title_cache)
+
 
-    metrics["composite_score"] = composite
-    metrics["composite_percent"] = composite * 100
-    metrics["second"] = str(second_path)
-    return metrics, first_list, second_list
+def _compare_in_worker(
+    second_path: str,
+    rbo_p: float,
+    match: str,
+    profile: bool,
+    metrics: list[str] | None = None,
+    depth: int | None = None,
+) -> tuple[tuple[dict, list[str], list[str]], dict | None, dict]:
+    """
+    Run one comparison, returning alongside it the worker's profile stats and
+    the titles it normalized, for the parent process to save.
+    """
+    assert _worker_reference is not None, "Worker was not initialized"
+    profiler = Profiler() if profile else None
+    profiling.activate(profiler)
+    comparison = compare_to_reference(
+        _worker_reference,
+        second_path,
+        rbo_p,
+        match,
+        profiler=profiler,
+        metrics=metrics,
+        depth=depth,
+        reference=_worker_ranked,
+    )
+    profiling.activate(None)
+    stats = None if profiler is None else profiler.stats
+    computed = {}
+    if _worker_title_cache is not None:
+        computed = _worker_title_cache.take_computed()
+    return comparison, stats, computed
+
+
+def _plot_names(paths: list[str]) -> list[str]:
+    """
+    A file name stem per target plot, unique even for targets sharing a file
+    name: those are named by their path below the directory they have in
+    common (runs/a/top.csv and runs/b/top.csv give a_top and b_top), and any
+    name still taken gets a numbered suffix.
+    """
+    stems = [Path(path).stem for path in paths]
+    counts = Counter(stems)
+    clashing = [
+        Path(path).resolve().parent
+        for path, stem in zip(paths, stems)
+        if counts[stem] > 1
+    ]
+    root = Path(os.path.commonpath(clashing)) if clashing else None
+
+    names = []
+    taken: Counter = Counter()
+    for path, stem in zip(paths, stems):
+        if counts[stem] > 1:
+            relative = Path(path).resolve().with_suffix("").relative_to(root)
+            stem = "_".join(relative.parts)
+        taken[stem] += 1
+        names.append(stem if taken[stem] == 1 else f"{stem}-{taken[stem]}")
+    return names
+
+
+def _present_columns(results: list[dict]) -> list[tuple[str, str]]:
+    """The COLUMNS that at least one result has a value for."""
+    return [
+        (key, header)
+        for key, header in COLUMNS
+        if any(key in entry for entry in results)
+    ]
 
 
 def format_table(results: list[dict]) -> str:
+    columns = _present_columns(results)
+
     def format_value(key: str, value: float | str) -> str:
         if pd.isna(value):
             return "-"
         if key == "second":
             return str(value)
-        if key == "edit_distance":
+        if key in ("edit_distance", "rank_based_edit_distance"):
             return f"{int(value)}"
         if key == "composite_percent":
             return f"{value:.0f}%"
@@ -53,16 +199,16 @@ def format_table(results: list[dict]) -> str:
 
     rows: list[list[str]] = []
     for entry in results:
-        rows.append([format_value(key, entry.get(key)) for key, _ in COLUMNS])
+        rows.append([format_value(key, entry.get(key)) for key, _ in columns])
 
     col_widths = []
-    for idx, (_, header) in enumerate(COLUMNS):
+    for idx, (_, header) in enumerate(columns):
         max_row_width = max((len(row[idx]) for row in rows), default=0)
         col_widths.append(max(len(header), max_row_width))
 
     header_line = " | ".join(
         (header.ljust(col_widths[idx]) if idx == 0 else header.rjust(col_widths[idx]))
-        for idx, (_, header) in enumerate(COLUMNS)
+        for idx, (_, header) in enumerate(columns)
     )
     separator = "-+-".join("-" * width for width in col_widths)
 
@@ -73,7 +219,7 @@ def format_table(results: list[dict]) -> str:
                 row[idx].ljust(col_widths[idx])
                 if idx == 0
                 else row[idx].rjust(col_widths[idx])
-                for idx in range(len(COLUMNS))
+                for idx in range(len(columns))
             )
         )
 
@@ -87,26 +233,87 @@ def main(
     csv_path: str | None,
     plot: bool = False,
     top_k: int = 50,
+    jobs: int = 1,
+    title_cache_path: str | None = None,
+    match: str = "exact",
+    profile: str | None = None,
+    metrics: list[str] | None = None,
+    depth: int | None = None,
+    plot_dir: str | None = None,
+    plot_format: str = "png",
 ) -> None:
     results = []
     reference_list: list[str] | None = None
     comparison_lists: list[tuple[str, list[str]]] = []
 
-    for second_path in seconds:
-        comparison, first_list, second_list = compare_pair(
-            first, second_path, rbo_p=rbo_p
-        )
+    if title_cache_path:
+        title_cache = TitleCache(path=title_cache_path)
+        use_title_cache(title_cache)
+
+    profiler = Profiler() if profile else None
+    profiling.activate(profiler)
+
+    reference_df = read_list(first, depth=depth)
+    if jobs > 1:
+        # Workers start from the saved cache and send back the titles they
+        # normalize; only this process writes it back.
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(reference_df, title_cache_path),
+        ) as executor:
+            comparisons = []
+            for comparison, stats, computed in executor.map(
+                partial(
+                    _compare_in_worker,
+                    rbo_p=rbo_p,
+                    match=match,
+                    profile=profiler is not None,
+                    metrics=metrics,
+                    depth=depth,
+                ),
+                seconds,
+            ):
+                comparisons.append(comparison)
+                if title_cache_path:
+                    title_cache.update(computed)
+                if profiler is not None and stats is not None:
+                    profiler.merge(stats)
+    else:
+        reference = RankedList(reference_df["track"], vocabulary={})
+        comparisons = [
+            compare_to_reference(
+                reference_df,
+                second_path,
+                rbo_p=rbo_p,
+                match=match,
+                profiler=profiler,
+                metrics=metrics,
+                depth=depth,
+                reference=reference,
+            )
+            for second_path in seconds
+        ]
+
+    for second_path, (comparison, first_list, second_list) in zip(seconds, comparisons):
         comparison["second"] = Path(second_path).name
         results.append(comparison)
         comparison_lists.append((Path(second_path).name, second_list))
         if reference_list is None:
             reference_list = first_list
 
+    if title_cache_path:
+        title_cache.save()
+
     print(format_table(results))
 
+    if profiler is not None:
+        print(f"\n{profiler.report(profile)}")
+        profiling.activate(None)
+
     if csv_path:
         frame = pd.DataFrame(results)
-        frame = frame[[key for key, _ in COLUMNS]]
+        frame = frame[[key for key, _ in _present_columns(results)]]
         frame.to_csv(csv_path, index=False)
         print(f"\nSaved CSV to {csv_path}")
 
@@ -117,6 +324,28 @@ def main(
             top_k=max(1, top_k),
         )
 
+    if plot_dir and reference_list:
+        paths = plots.render_connection_graphs(
+            [
+                (name, reference_list, second_list)
+                for name, (_, second_list) in zip(
+                    _plot_names(seconds), comparison_lists
+                )
+            ],
+            plot_dir,
+            image_format=plot_format,
+            jobs=jobs,
+            list1_title=Path(first).stem,
+            main_title="Top Tracks According to\n\n",
+        )
+        plots.rank_alignment_matrix(
+            reference_list,
+            comparison_lists,
+            top_k=max(1, top_k),
+            output=Path(plot_dir) / f"alignment.{plot_format}",
+        )
+        print(f"\nSaved {len(paths) + 1} plots to {plot_dir}")
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -157,6 +386,53 @@ if __name__ == "__main__":
         default=50,
         help="Number of rows to show in the plot (default: 50)",
     )
+    parser.add_argument(
+        "--plot-dir",
+        help="Save a connection graph per target and the alignment plot to this "
+        "directory instead of showing them; rendered over --jobs processes",
+    )
+    parser.add_argument(
+        "--plot-format",
+        choices=["png", "svg"],
+        default="png",
+        help="Image format for --plot-dir (default: png)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes for the comparisons (default: 1)",
+    )
+    parser.add_argument(
+        "--title-cache",
+        help="JSON file that keeps normalized titles between runs",
+    )
+    parser.add_argument(
+        "--match",
+        choices=MATCH_MODES,
+        default="exact",
+        help="Match titles by exact keys or also by near-duplicates (default: exact)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="table",
+        choices=["table", "json"],
+        help="Report time and call counts per stage and metric, as a table or JSON",
+    )
+    parser.add_argument(
+        "--metrics",
+        nargs="+",
+        choices=list(METRICS),
+        help="Only compute these metrics (default: all); the composite needs "
+        f"{', '.join(COMPOSITE_METRICS)}",
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        help="Only compare the top K tracks of each list",
+    )
     args = parser.parse_args()
 
     main(
@@ -166,4 +442,12 @@ if __name__ == "__main__":
         csv_path=args.out_csv,
         plot=args.plot,
         top_k=args.top_k,
+        jobs=args.jobs,
+        title_cache_path=args.title_cache,
+        match=args.match,
+        profile=args.profile,
+        metrics=args.metrics,
+        depth=args.depth,
+        plot_dir=args.plot_dir,
+        plot_format=args.plot_format,
     )
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+
+DEFAULT_CACHE_DIR = ".cache/ocr"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Bump whenever preprocessing or parsing of the OCR input changes in a way the
+# settings passed to `key` do not capture.
+OCR_CACHE_VERSION = 1
+
+
+class OcrCache:
+    def __init__(
+        self, path: str | Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        """
+        On-disk cache of OCR text, one file per image and settings.
+
+        Entries are keyed by the image content, not its name or mtime, so a
+        renamed or touched screenshot is still a hit and an edited one is not.
+        Reading an entry marks it as recently used; when the cache grows past
+        max_bytes the least recently used entries are evicted. The sizes of
+        the entries are read from the directory once, on the first put, and
+        kept up to date in memory after that.
+
+        Parameters:
+            path: Directory holding the entries.
+            max_bytes: Total size the entries may take up.
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Entry -> size in bytes, least recently used first; None until read.
+        self._sizes: OrderedDict[Path, int] | None = None
+        self._total = 0
+
+    def key(self, image_path: str | Path, settings: dict) -> str:
+        """
+        Hash of the image bytes and every setting that affects the OCR output,
+        such as the Tesseract version and the preprocessing options.
+        """
+        digest = hashlib.sha256()
+        digest.update(
+            json.dumps(
+                {"version": OCR_CACHE_VERSION, **settings}, sort_keys=True
+            ).encode()
+        )
+        with open(image_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.path / f"{key}.txt"
+
+    def get(self, key: str) -> str | None:
+        entry = self._entry(key)
+        try:
+            text = entry.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        os.utime(entry)
+        if self._sizes is not None and entry in self._sizes:
+            self._sizes.move_to_end(entry)
+        self.hits += 1
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        entry = self._entry(key)
+        temp_path = entry.with_suffix(".tmp")
+        temp_path.write_text(text, encoding="utf-8")
+        size = temp_path.stat().st_size
+        os.replace(temp_path, entry)
+
+        sizes = self._entry_sizes()
+        self._total += size - sizes.pop(entry, 0)
+        sizes[entry] = size
+        self._evict()
+
+    def _entry_sizes(self) -> OrderedDict[Path, int]:
+        if self._sizes is None:
+            entries = [(entry, entry.stat()) for entry in self.path.glob("*.txt")]
+            entries.sort(key=lambda item: item[1].st_mtime_ns)
+            self._sizes = OrderedDict((entry, stat.st_size) for entry, stat in entries)
+            self._total = sum(self._sizes.values())
+        return self._sizes
+
+    def _evict(self) -> None:
+        sizes = self._entry_sizes()
+        while self._total > self.max_bytes and sizes:
+            entry, size = sizes.popitem(last=False)
+            entry.unlink(missing_ok=True)
+            self._total -= size
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. after changing how screenshots are read."""
+        for entry in self.path.glob("*.txt"):
+            entry.unlink(missing_ok=True)
+        self._sizes = None
@@ -0,0 +1,89 @@
+import re
+
+import pandas as pd
+
+
+# "1 Title", "#1 Title", "1. Title" or "1) Title"
+_RANKED_LINE = re.compile(r"^#?(\d{1,3})[.)]?\s+(.+)$")
+
+
+def _read_entries(
+    lines: list[str], ranked: list[re.Match | None], start: int
+) -> list[tuple[int | None, str, str]]:
+    """
+    The entries of a screenshot read from its start-th line on.
+
+    A line that looks ranked is only a track where a rank is expected: when it
+    carries the rank after the previous track's, or when it follows another
+    line than a track. Otherwise, like an unranked line, it is the artist of
+    the track right before it ("21 Savage" under "1 Redrum"), or dropped.
+    """
+    match = ranked[start]
+    entries = [(int(match.group(1)), match.group(2).strip(), "")]
+    after_track = True
+    for line, match in zip(lines[start + 1 :], ranked[start + 1 :]):
+        last_rank = entries[-1][0]
+        if match is not None:
+            rank = int(match.group(1))
+            if rank == last_rank + 1 or (not after_track and rank > last_rank):
+                entries.append((rank, match.group(2).strip(), ""))
+                after_track = True
+                continue
+        if after_track:
+            entries[-1] = (*entries[-1][:2], line)
+        after_track = False
+    return entries
+
+
+def parse_tracks(text: str) -> list[tuple[int | None, str, str]]:
+    """
+    Read (rank, track, artist) entries from the OCR text of one screenshot.
+
+    Lines starting with a rank ("1 Title", "#1 Title", "1. Title") are tracks,
+    and the line right after one is taken as its artist. Artist names can start
+    with a number too ("21 Savage", "50 Cent"), so the tracks are the ranked
+    lines that form the longest run of increasing ranks, every other ranked
+    line being read as an artist. Lines before the first track belong to an
+    entry cut off at the top of the screenshot and are dropped. Without any
+    ranked line, every line is a track with unknown rank and artist.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    ranked = [_RANKED_LINE.match(line) for line in lines]
+    if not any(ranked):
+        return [(None, line, "") for line in lines]
+
+    readings = [
+        _read_entries(lines, ranked, start)
+        for start, match in enumerate(ranked)
+        if match is not None
+    ]
+    # max keeps the earliest start among equally long readings.
+    return max(readings, key=len)
+
+
+def tracks_frame(texts: dict[str, str]) -> pd.DataFrame:
+    """
+    Merge the tracks of several screenshots into one ranked track/artist list.
+
+    Screenshots of a scrolled list overlap, so a rank (or, for unranked
+    tracks, a title) seen in an earlier screenshot is skipped. Ranked tracks
+    are ordered by rank.
+    """
+    seen_ranks: set[int] = set()
+    seen_titles: set[str] = set()
+    rows = []
+    for text in texts.values():
+        for rank, track, artist in parse_tracks(text):
+            if rank is not None:
+                if rank in seen_ranks:
+                    continue
+                seen_ranks.add(rank)
+            elif track in seen_titles:
+                continue
+            seen_titles.add(track)
+            rows.append((rank, track, artist))
+
+    frame = pd.DataFrame(rows, columns=["rank", "track", "artist"])
+    if frame["rank"].notna().all():
+        frame = frame.sort_values("rank", kind="stable")
+    return frame[["track", "artist"]].reset_index(drop=True)
@@ -0,0 +1,230 @@
+import argparse
+import datetime
+import json
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from history import DEFAULT_CACHE_DIR, PlayLog, load_history
+
+
+DAY_NS = 24 * 60 * 60 * 10**9
+INDEX_VERSION = 1
+_EPOCH = datetime.date(1970, 1, 1)
+_ARRAYS = ("indptr", "indices", "data")
+
+
+def top_codes(counts: np.ndarray, n: int) -> np.ndarray:
+    """
+    Codes of the n most played tracks of a per-track count array, best first.
+
+    Ties go to the lower code. Only tracks with at least one play are returned.
+
+    A PlayLog numbers its tracks in the order they first appear in its rows,
+    so for a log in time order and counts from its first day on, this is the
+    order value_counts gives over the same plays. It can differ otherwise: for
+    rows out of time order (such as exports concatenated out of order), or a
+    window starting later, value_counts breaks ties by first appearance within
+    the window instead.
+    """
+    played = np.flatnonzero(counts)
+    if len(played) > n:
+        # Keep everything tied with the n-th largest count, then order those.
+        kth = len(played) - n
+        threshold = np.partition(counts[played], kth)[kth]
+        played = played[counts[played] >= threshold]
+    order = np.lexsort((played, -counts[played]))
+    return played[order[:n]]
+
+
+class PlayIndex:
+    def __init__(self, daily: sparse.csr_array, tracks: np.ndarray, first_day: int):
+        """
+        Play counts of every track on every day of a listening history.
+
+        Built once from a PlayLog (see from_log) and reused by every window
+        query. The counts of any range of days come from per-track running
+        totals, so they cost one binary search per track, however many plays
+        the range holds.
+
+        Parameters:
+            daily: days x tracks CSR matrix of play counts; row d holds the day
+                first_day + d and column t the track tracks[t].
+            tracks: Track names, indexed by track ID (the PlayLog's track code).
+            first_day: The day of the first row, in days since the epoch.
+        """
+        self.daily = daily
+        self.tracks = np.asarray(tracks, dtype=object)
+        self.first_day = first_day
+
+    @classmethod
+    def from_log(
+        cls, log: PlayLog, min_ms_played: int = 0, include_skipped: bool = True
+    ) -> "PlayIndex":
+        """
+        Index the plays of a log by UTC day.
+
+        Parameters:
+            log: The listening history.
+            min_ms_played: Drop plays shorter than this.
+            include_skipped: If False, drop plays marked as skipped.
+        """
+        codes = np.asarray(log.track_codes)
+        keep = codes >= 0
+        if min_ms_played:
+            keep &= np.asarray(log.ms_played) >= min_ms_played
+        if not include_skipped:
+            keep &= ~np.asarray(log.skipped)
+        days = np.asarray(log.ts)[keep] // DAY_NS
+        first_day = int(days.min()) if len(days) else 0
+        span = int(days.max()) - first_day + 1 if len(days) else 0
+        daily = sparse.csr_array(
+            (np.ones(len(days), dtype=np.int32), (days - first_day, codes[keep])),
+            shape=(span, len(log.tracks)),
+        )
+        daily.sum_duplicates()
+        return cls(daily, log.tracks, first_day)
+
+    @property
+    def days(self) -> int:
+        """The number of days from the first play to the last, inclusive."""
+        return self.daily.shape[0]
+
+    def date(self, day: int) -> datetime.date:
+        """The calendar day of a day index."""
+        return _EPOCH + datetime.timedelta(days=self.first_day + int(day))
+
+    def day(self, date: datetime.date) -> int:
+        """The day index of a calendar day; negative before the first play."""
+        return (date - _EPOCH).days - self.first_day
+
+    def played_days(self) -> np.ndarray:
+        """Indices of the days with at least one play."""
+        return np.flatnonzero(np.diff(self.daily.indptr))
+
+    @cached_property
+    def _by_track(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        For every track, in one array ordered by track then day: the keys
+        track * (days + 1) + day of the days it was played, and its running
+        total of plays up to and including each of them; plus where each
+        track's entries start.
+        """
+        by_track = self.daily.tocsc()
+        by_track.sort_indices()
+        entries = np.diff(by_track.indptr)
+        track_ids = np.repeat(np.arange(len(entries), dtype=np.int64), entries)
+        keys = track_ids * (self.days + 1) + by_track.indices
+        running = np.cumsum(by_track.data, dtype=np.int64)
+        before = np.concatenate([[0], running])[by_track.indptr[:-1]]
+        return keys, running - np.repeat(before, entries), by_track.indptr
+
+    def plays_before(self, day: int) -> np.ndarray:
+        """Per-track play counts on the days before day."""
+        keys, running, starts = self._by_track
+        tracks = len(self.tracks)
+        if day <= 0:
+            return np.zeros(tracks, dtype=np.int64)
+        day = min(day, self.days)
+        queries = np.arange(tracks, dtype=np.int64) * (self.days + 1) + day
+        # One past the track's last entry before day, within its own entries.
+        ends = np.searchsorted(keys, queries, side="left")
+        counts = np.zeros(tracks, dtype=np.int64)
+        played = ends > starts[:-1]
+        counts[played] = running[ends[played] - 1]
+        return counts
+
+    def counts(self, start: int, end: int) -> np.ndarray:
+        """Per-track play counts on days start..end, inclusive."""
+        return self.plays_before(end + 1) - self.plays_before(start)
+
+    def top(self, start: int, end: int, n: int = 100) -> np.ndarray:
+        """Track IDs of the n most played tracks on days start..end, best first."""
+        return top_codes(self.counts(start, end), n)
+
+    def top_tracks(self, start: int, end: int, n: int = 100) -> list[str]:
+        """Names of the n most played tracks on days start..end, best first."""
+        return self.tracks[self.top(start, end, n)].tolist()
+
+    def save(self, path: str | Path) -> None:
+        """Write the index to a directory; load reads it back."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        (path / "manifest.json").unlink(missing_ok=True)
+        for name in _ARRAYS:
+            np.save(path / f"{name}.npy", getattr(self.daily, name))
+        (path / "tracks.json").write_text(
+            json.dumps(self.tracks.tolist(), ensure_ascii=False), encoding="utf-8"
+        )
+        manifest = {
+            "version": INDEX_VERSION,
+            "first_day": self.first_day,
+            "shape": list(self.daily.shape),
+        }
+        # Written last, so an interrupted save never looks like a valid index.
+        (path / "manifest.json").write_text(json.dumps(manifest))
+
+    @classmethod
+    def load(cls, path: str | Path) -> "PlayIndex":
+        """Read an index written by save, memory-mapping its arrays."""
+        path = Path(path)
+        manifest_path = path / "manifest.json"
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"No play index in {path}")
+        manifest = json.loads(manifest_path.read_text())
+        if manifest.get("version") != INDEX_VERSION:
+            raise ValueError(
+                f"Play index in {path} has version {manifest.get('version')}, "
+                f"expected {INDEX_VERSION}; rebuild it"
+            )
+        arrays = [np.load(path / f"{name}.npy", mmap_mode="r") for name in _ARRAYS]
+        indptr, indices, data = arrays
+        daily = sparse.csr_array(
+            (data, indices, indptr), shape=tuple(manifest["shape"]), copy=False
+        )
+        tracks = json.loads((path / "tracks.json").read_text(encoding="utf-8"))
+        return cls(daily, np.array(tracks, dtype=object), manifest["first_day"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build a per-day play-count index of a listening history."
+    )
+    parser.add_argument(
+        "--raw",
+        nargs="+",
+        required=True,
+        help="raw Extended Streaming History exports (CSV or JSON)",
+    )
+    parser.add_argument(
+        "-o",
+        "--out",
+        required=True,
+        help="directory to save the index to",
+    )
+    parser.add_argument(
+        "--min-ms-played",
+        type=int,
+        default=0,
+        help="drop plays shorter than this (default: 0)",
+    )
+    parser.add_argument(
+        "--no-skipped",
+        action="store_false",
+        dest="include_skipped",
+        help="drop plays marked as skipped",
+    )
+    args = parser.parse_args()
+
+    index = PlayIndex.from_log(
+        load_history(args.raw, cache_dir=DEFAULT_CACHE_DIR),
+        min_ms_played=args.min_ms_played,
+        include_skipped=args.include_skipped,
+    )
+    index.save(args.out)
+    print(
+        f"Indexed {index.daily.nnz} track-days over {index.days} days "
+        f"and {len(index.tracks)} tracks to {args.out}"
+    )
@@ -1,5 +1,8 @@
 import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
+from matplotlib.figure import Figure
+from pathlib import Path
 
 
 @contextmanager
@@ -11,6 +14,125 @@ def optional_xkcd(enabled: bool):
         yield
 
 
+def _connection_colors(list1: list, list2: list, top_k: int) -> dict:
+    """
+    Black for items in both lists, blue for items in only one top k, red for
+    items in only one list.
+    """
+    list1_top_k = list1[:top_k]
+    list2_top_k = list2[:top_k]
+    in_both = set(list1).intersection(set(list2))
+    disagree_tpp = set(list1_top_k).symmetric_difference(set(list2_top_k))
+    disagree = set(list1).symmetric_difference(set(list2))
+    colors_dict = {item: "black" for item in in_both}
+    colors_dict.update({item: "blue" for item in disagree_tpp})
+    colors_dict.update({item: "red" for item in disagree})
+    return colors_dict
+
+
+class ConnectionGraphRenderer:
+    def __init__(self, top_k: int = 20, xkcd: bool = False, figure=None):
+        """
+        Draw connection graphs into one figure, reusing its artists.
+
+        The figure, its axes and a fixed pool of text and line artists are
+        created once; every draw only updates their text, position, color and
+        visibility. Without a figure, a standalone Agg-backed Figure is used,
+        which needs no display and is independent of pyplot, so renderers can
+        run in worker processes on a headless server.
+
+        Parameters:
+            top_k: The most items drawn from each list.
+            xkcd: Whether to draw in XKCD style.
+            figure: Optional existing figure to draw into, e.g. from pyplot for
+                interactive display.
+        """
+        self.top_k = top_k
+        self.xkcd = xkcd
+        self.figure = figure if figure is not None else Figure(figsize=(10, 6))
+        self.figure.set_size_inches(10, 6)
+        with optional_xkcd(xkcd):
+            self.ax = self.figure.add_subplot()
+            self.ax.set_xlim(-0.2, 1.2)
+            self.ax.axis("off")
+            self.list1_title = self.ax.text(
+                0, 0, "", fontsize=15, ha="right", va="center"
+            )
+            self.list2_title = self.ax.text(
+                1, 0, "", fontsize=15, ha="left", va="center"
+            )
+            self.list1_labels = [
+                self.ax.text(0, 0, "", ha="right", va="center", fontsize=10)
+                for _ in range(top_k)
+            ]
+            self.list2_labels = [
+                self.ax.text(1, 0, "", ha="left", va="center", fontsize=10)
+                for _ in range(top_k)
+            ]
+            self.lines = [
+                self.ax.plot([], [], "k-", alpha=0.7)[0] for _ in range(top_k)
+            ]
+
+    def draw(
+        self,
+        list1: list,
+        list2: list,
+        list1_title: str = "",
+        list2_title: str = "",
+        main_title: str = "",
+    ) -> None:
+        """
+        Show the connection graph of list1 and list2 on the figure.
+        """
+        with optional_xkcd(self.xkcd):
+            self._draw(list1, list2, list1_title, list2_title, main_title)
+
+    def _draw(self, list1, list2, list1_title, list2_title, main_title) -> None:
+        list1_top_k = list1[: self.top_k]
+        list2_top_k = list2[: self.top_k]
+        positions1 = {item: len(list1_top_k) - i for i, item in enumerate(list1_top_k)}
+        positions2 = {item: len(list2_top_k) - i for i, item in enumerate(list2_top_k)}
+        colors_dict = _connection_colors(list1, list2, self.top_k)
+
+        self.list1_title.set_text(list1_title)
+        self.list1_title.set_y(len(list1_top_k) + 2)
+        self.list2_title.set_text(list2_title)
+        self.list2_title.set_y(len(list2_top_k) + 2)
+
+        for i, label in enumerate(self.list1_labels):
+            label.set_visible(i < len(list1_top_k))
+            if i < len(list1_top_k):
+                item = list1_top_k[i]
+                label.set_text(item + " (" + str(i + 1) + ")")
+                label.set_y(len(list1_top_k) - i)
+                label.set_color(colors_dict[item])
+        for i, label in enumerate(self.list2_labels):
+            label.set_visible(i < len(list2_top_k))
+            if i < len(list2_top_k):
+                item = list2_top_k[i]
+                label.set_text("(" + str(i + 1) + ") " + item)
+                label.set_y(len(list1_top_k) - i)
+                label.set_color(colors_dict[item])
+
+        connected = [item for item in positions1 if item in positions2]
+        for line, item in zip(self.lines, connected):
+            line.set_data([0.03, 0.97], [positions1[item], positions2[item]])
+            line.set_visible(True)
+        for line in self.lines[len(connected) :]:
+            line.set_visible(False)
+
+        self.ax.set_ylim(-1, max(len(list1_top_k), len(list2_top_k)))
+        self.ax.set_title(main_title, fontsize=14)
+
+    def render(self, list1: list, list2: list, output: str | Path, **titles) -> Path:
+        """
+        Draw the graph and save it; the format follows the suffix (.png, .svg).
+        """
+        self.draw(list1, list2, **titles)
+        self.figure.savefig(output)
+        return Path(output)
+
+
 def connection_graph(
     list1: list,
     list2: list,
@@ -19,84 +141,89 @@ def connection_graph(
     list2_title: str = "",
     main_title: str = "",
     xkcd: bool = False,
+    output: str | Path | None = None,
 ):
     """
     Draw a connection graph between two lists in XKCD style.
 
     Parameters:
         list1, list2: The two ordered lists to compare.
+        output: If given, save the graph to this file (PNG or SVG, by suffix)
+            instead of showing it.
     """
-    with optional_xkcd(xkcd):
-        fig, ax = plt.subplots(figsize=(10, 6))
+    titles = {
+        "list1_title": list1_title,
+        "list2_title": list2_title,
+        "main_title": main_title,
+    }
+    if output is not None:
+        ConnectionGraphRenderer(top_k, xkcd).render(list1, list2, output, **titles)
+        return
 
-        list1_top_k = list1[:top_k]
-        list2_top_k = list2[:top_k]
-        positions1 = {item: len(list1_top_k) - i for i, item in enumerate(list1_top_k)}
-        positions2 = {item: len(list2_top_k) - i for i, item in enumerate(list2_top_k)}
+    renderer = ConnectionGraphRenderer(top_k, xkcd, figure=plt.figure())
+    renderer.draw(list1, list2, **titles)
+    plt.show()
 
-        all_items = set(list1_top_k).union(set(list2_top_k))
-        in_both = set(list1).intersection(set(list2))
-        disagree_tpp = set(list1_top_k).symmetric_difference(set(list2_top_k))
-        disagree = set(list1).symmetric_difference(set(list2))
-        colors_dict = {item: "black" for item in in_both}
-        colors_dict.update({item: "blue" for item in disagree_tpp})
-        colors_dict.update({item: "red" for item in disagree})
-
-        if list1_title != "":
-            ax.text(
-                0,
-                len(list1_top_k) + 2,
-                list1_title,
-                fontsize=15,
-                ha="right",
-                va="center",
-            )
-        for i, item in enumerate(list1_top_k):
-            ax.text(
-                0,
-                len(list1_top_k) - i,
-                item + " (" + str(i + 1) + ")",
-                ha="right",
-                va="center",
-                fontsize=10,
-                color=colors_dict[item],
-            )
-        if list2_title != "":
-            ax.text(
-                1,
-                len(list2_top_k) + 2,
-                list2_title,
-                fontsize=15,
-                ha="left",
-                va="center",
-            )
-        for i, item in enumerate(list2_top_k):
-            ax.text(
-                1,
-                len(list1_top_k) - i,
-                "(" + str(i + 1) + ") " + item,
-                ha="left",
-                va="center",
-                fontsize=10,
-                color=colors_dict[item],
-            )
 
-        for item in all_items:
-            if item in positions1 and item in positions2:
-                ax.plot(
-                    [0.03, 0.97],
-                    [positions1[item], positions2[item]],
-                    "k-",
-                    alpha=0.7,
-                )
-
-        ax.set_xlim(-0.2, 1.2)
-        ax.set_ylim(-1, max(len(list1_top_k), len(list2_top_k)))
-        ax.axis("off")
-        if main_title != "":
-            ax.set_title(main_title, fontsize=14)
+_worker_renderer: ConnectionGraphRenderer | None = None
 
-        plt.show()
+
+def _init_render_worker(top_k: int, xkcd: bool) -> None:
+    """Create the one renderer each worker process reuses."""
+    global _worker_renderer
+    _worker_renderer = ConnectionGraphRenderer(top_k, xkcd)
+
+
+def _render_in_worker(job: tuple[Path, list, list, dict]) -> Path:
+    assert _worker_renderer is not None, "Worker was not initialized"
+    output, list1, list2, titles = job
+    return _worker_renderer.render(list1, list2, output, **titles)
+
+
+def render_connection_graphs(
+    pairs: list[tuple[str, list, list]],
+    output_dir: str | Path,
+    image_format: str = "png",
+    jobs: int = 1,
+    top_k: int = 20,
+    xkcd: bool = False,
+    **titles,
+) -> list[Path]:
+    """
+    Save the connection graph of every (name, list1, list2) pair to
+    output_dir/name.image_format, without a display. The titles apply to every
+    graph; list2_title defaults to the pair's name.
+
+    Each process keeps a single renderer and redraws it for every pair it
+    gets, and with jobs > 1 the pairs are spread over that many processes.
+
+    Returns:
+        The written paths, in the order of pairs.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    work = [
+        (
+            output_dir / f"{name}.{image_format}",
+            list1,
+            list2,
+            {"list2_title": name, **titles},
+        )
+        for name, list1, list2 in pairs
+    ]
+    if jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(work)),
+            initializer=_init_render_worker,
+            initargs=(top_k, xkcd),
+        ) as executor:
+            chunksize = max(1, len(work) // (4 * jobs))
+            return list(executor.map(_render_in_worker, work, chunksize=chunksize))
+
+    renderer = ConnectionGraphRenderer(top_k, xkcd)
+    return [
+        renderer.render(list1, list2, output, **kw) for output, list1, list2, kw in work
+    ]
 
 
 def rank_alignment_matrix(
@@ -104,10 +231,14 @@ def rank_alignment_matrix(
     comparisons: list[tuple[str, list[str]]],
     top_k: int = 50,
     missing_color: str = "#d9d9d9",
+    output: str | Path | None = None,
 ):
     """
     Visualize how multiple ranked lists align against a reference list using colors.
 
+    With an output path the matrix is saved there (PNG or SVG, by suffix) on a
+    standalone Agg figure instead of being shown.
+
     Each comparison list is shown as a column, ordered by its own ranking. Cells are
     colored by how far the item's position deviates from the reference list: green
     means it appears in the same position, red means it is far away, and gray means
@@ -161,7 +292,9 @@ def rank_alignment_matrix(
 
     fig_width = 3 + 2 * len(comparisons)
     fig_height = 0.35 * max_rows + 2
-    fig, ax = plt.subplots(figsize=(fig_width, fig_height))
+    fig = Figure() if output is not None else plt.figure()
+    fig.set_size_inches(fig_width, fig_height)
+    ax = fig.add_subplot()
     ax.axis("off")
 
     table = ax.table(
@@ -177,7 +310,7 @@ def rank_alignment_matrix(
 
     sm = plt.cm.ScalarMappable(cmap=cmap, norm=plt.Normalize(vmin=0, vmax=1))
     sm.set_array([])
-    cbar = plt.colorbar(
+    cbar = fig.colorbar(
         sm,
         ax=ax,
         fraction=0.046,
@@ -197,4 +330,7 @@ def rank_alignment_matrix(
     )
 
     fig.tight_layout()
-    plt.show()
+    if output is not None:
+        fig.savefig(output)
+    else:
+        plt.show()
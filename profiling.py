@@ -0,0 +1,94 @@
+import functools
+import json
+import time
+from contextlib import contextmanager
+
+
+class Profiler:
+    def __init__(self):
+        """
+        Accumulates wall time and call counts per named stage.
+
+        Times are inclusive: a metric that calls another metric is charged for
+        both, and the inner one is recorded under its own name as well.
+        """
+        self.stats: dict[str, dict[str, float]] = {}
+
+    def record(self, name: str, seconds: float, calls: int = 1) -> None:
+        entry = self.stats.setdefault(name, {"calls": 0, "seconds": 0.0})
+        entry["calls"] += calls
+        entry["seconds"] += seconds
+
+    @contextmanager
+    def measure(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def merge(self, stats: dict[str, dict[str, float]]) -> None:
+        """Add stats collected elsewhere, e.g. in a worker process."""
+        for name, entry in stats.items():
+            self.record(name, entry["seconds"], int(entry["calls"]))
+
+    def to_json(self) -> str:
+        return json.dumps(self.stats, indent=2)
+
+    def format_table(self) -> str:
+        rows = sorted(self.stats.items(), key=lambda item: -item[1]["seconds"])
+        width = max([len("Stage"), *(len(name) for name, _ in rows)])
+        lines = [
+            f"{'Stage':<{width}} | {'Calls':>6} | {'Total (ms)':>10} | {'Mean (ms)':>9}",
+            f"{'-' * width}-+-{'-' * 6}-+-{'-' * 10}-+-{'-' * 9}",
+        ]
+        for name, entry in rows:
+            total = entry["seconds"] * 1000
+            mean = total / entry["calls"] if entry["calls"] else 0.0
+            lines.append(
+                f"{name:<{width}} | {int(entry['calls']):>6} | {total:>10.3f} | {mean:>9.3f}"
+            )
+        return "\n".join(lines)
+
+    def report(self, output_format: str = "table") -> str:
+        return self.to_json() if output_format == "json" else self.format_table()
+
+
+_active: Profiler | None = None
+
+
+def activate(profiler: Profiler | None) -> None:
+    """Set the profiler that `stage` records into; None turns stage timing off."""
+    global _active
+    _active = profiler
+
+
+@contextmanager
+def stage(name: str):
+    """Time a pipeline stage with the active profiler, if there is one."""
+    if _active is None:
+        yield
+    else:
+        with _active.measure(name):
+            yield
+
+
+def profiled(method=None, *, name: str | None = None):
+    """
+    Time a method with its instance's profiler attribute, when it is set.
+
+    Stats are recorded under name, by default the method's name. Use as
+    @profiled or @profiled(name=...).
+    """
+    if method is None:
+        return functools.partial(profiled, name=name)
+    label = name or method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.profiler is None:
+            return method(self, *args, **kwargs)
+        with self.profiler.measure(label):
+            return method(self, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,133 @@
+from collections.abc import Iterable, Sequence
+from functools import cached_property
+
+import numpy as np
+
+
+class RankedList:
+    def __init__(self, items: Iterable, vocabulary: dict | None = None):
+        """
+        A ranked list interned to an int32 array of IDs, with the lookup tables
+        the similarity metrics need built once and kept for every later
+        comparison.
+
+        The lookup tables are arrays over the list's distinct IDs in increasing
+        order (unique_ids), so a lookup is a binary search (see locate) and two
+        lists intersect by merging their sorted IDs, without a dict or set per
+        list.
+
+        Lists are only comparable by ID when they share a vocabulary;
+        ListSimilarity re-encodes a list whose vocabulary differs. Build lists
+        that are compared with each other in one vocabulary, owned by the
+        caller, so it lives no longer than the comparisons that need it.
+
+        A list or other sequence of items is kept by reference, not copied, so
+        it must not change while the RankedList is in use.
+
+        Parameters:
+            items: The ranked items, best first.
+            vocabulary: Item -> ID mapping to intern into; unseen items are
+                added to it. Defaults to a new vocabulary of the list's own.
+        """
+        self.vocabulary: dict | None = {} if vocabulary is None else vocabulary
+        self.items = items if isinstance(items, Sequence) else list(items)
+        vocabulary, intern = self.vocabulary, self.vocabulary.setdefault
+        self.ids = np.fromiter(
+            (intern(item, len(vocabulary)) for item in self.items),
+            dtype=np.int32,
+            count=len(self.items),
+        )
+
+    @classmethod
+    def encode(cls, items, vocabulary: dict | None = None) -> "RankedList":
+        """
+        Return items as a RankedList in the given vocabulary, reusing items
+        itself when it already is one.
+        """
+        if isinstance(items, RankedList):
+            if items.vocabulary is not None and (
+                vocabulary is None or items.vocabulary is vocabulary
+            ):
+                return items
+            items = items.items
+        return cls(items, vocabulary)
+
+    def drop_vocabulary(self) -> None:
+        """
+        Stop holding on to the vocabulary, once nothing else is interned into
+        it. The list keeps its IDs and lookup tables, but is re-encoded from
+        its items before being compared with another list.
+        """
+        self.vocabulary = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __repr__(self) -> str:
+        return f"RankedList({self.items!r})"
+
+    def head(self, depth: int) -> "RankedList":
+        """The first depth items, as a RankedList in the same vocabulary."""
+        if depth >= len(self):
+            return self
+        return RankedList(self.items[:depth], self.vocabulary)
+
+    @cached_property
+    def _runs(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The distinct IDs in increasing order, with the positions of the first
+        and last occurrence of each.
+        """
+        order = np.argsort(self.ids, kind="stable").astype(np.int32)
+        ordered = self.ids[order]
+        starts = np.flatnonzero(np.diff(ordered, prepend=-1) != 0)
+        ends = np.append(starts[1:], len(ordered))[: len(starts)] - 1
+        return ordered[starts], order[starts], order[ends]
+
+    @property
+    def unique_ids(self) -> np.ndarray:
+        """The distinct IDs, in increasing order."""
+        return self._runs[0]
+
+    @property
+    def first_positions(self) -> np.ndarray:
+        """Position of the first occurrence of each of unique_ids."""
+        return self._runs[1]
+
+    @property
+    def last_positions(self) -> np.ndarray:
+        """Position of the last occurrence of each of unique_ids."""
+        return self._runs[2]
+
+    @cached_property
+    def _distinct_order(self) -> np.ndarray:
+        """Indices into unique_ids, in order of first occurrence."""
+        return np.argsort(self.first_positions, kind="stable")
+
+    @cached_property
+    def distinct_ids(self) -> np.ndarray:
+        """The distinct IDs, in order of first occurrence."""
+        return self.unique_ids[self._distinct_order]
+
+    @cached_property
+    def distinct_ranks(self) -> np.ndarray:
+        """
+        Rank of each of unique_ids among the distinct items, counting first
+        occurrences only.
+        """
+        ranks = np.empty(len(self._distinct_order), dtype=np.int64)
+        ranks[self._distinct_order] = np.arange(len(ranks))
+        return ranks
+
+    @cached_property
+    def is_distinct(self) -> bool:
+        """Whether no item appears twice."""
+        return len(self.unique_ids) == len(self.ids)
+
+    def locate(self, ids: np.ndarray) -> np.ndarray:
+        """Index of each ID in unique_ids, or -1 for IDs not in the list."""
+        unique = self.unique_ids
+        index = np.searchsorted(unique, ids)
+        found = index < len(unique)
+        found[found] = unique[index[found]] == np.asarray(ids)[found]
+        return np.where(found, index, -1)
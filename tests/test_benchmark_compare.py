@@ -0,0 +1,41 @@
+from compare import METRICS
+from dev.benchmark_compare import BENCHMARKS, find_regressions, run
+
+
+def _result(metric: str, size: int, seconds: float) -> dict:
+    return {
+        "metric": metric,
+        "size": size,
+        "overlap": 0.8,
+        "shuffle": 0.2,
+        "seconds": seconds,
+    }
+
+
+def test_find_regressions_flags_slowdowns_over_threshold():
+    baseline = [
+        _result("rbo", 1000, 0.010),
+        _result("rbo", 10, 0.0001),
+        _result("jaccard_similarity", 1000, 0.010),
+        _result("kendall_tau", 1000, 0.010),
+    ]
+    current = [
+        _result("rbo", 1000, 0.020),  # twice as slow
+        _result("rbo", 10, 0.0009),  # slower, but below min_seconds
+        _result("jaccard_similarity", 1000, 0.012),  # within the threshold
+        _result("kendall_tau", 1000, 0.005),  # faster
+        _result("topk_kendall", 1000, 1.0),  # not in the baseline
+    ]
+
+    regressions = find_regressions(current, baseline, threshold=0.25, min_seconds=0.001)
+
+    assert regressions == ["rbo at size 1000: 10.000 ms -> 20.000 ms"]
+
+
+def test_run_times_every_metric(capsys):
+    results = run([10], BENCHMARKS, overlap=0.8, shuffle=0.2, repeat=1)
+    capsys.readouterr()
+
+    assert [entry["metric"] for entry in results] == [*METRICS, "composite_score"]
+    assert "rank_based_edit_distance" in BENCHMARKS
+    assert all(entry["seconds"] > 0 for entry in results)
@@ -1,5 +1,9 @@
+import random
+
+import pytest
 from pytest import approx
-from compare import ListSimilarity
+from compare import COMPOSITE_METRICS, ListSimilarity, MatrixSimilarity
+from profiling import Profiler
 
 
 def test_identical_lists_scores_are_high():
@@ -30,3 +34,252 @@ def test_composite_penalizes_reordering():
     assert reversed_similarity.metrics["kendall_tau"] < 1.0
     assert reversed_similarity.metrics["edit_distance_normalized"] > 0
     assert reversed_similarity.composite_score() < aligned.composite_score()
+
+
+def test_rbo_matches_prefix_overlap_definition():
+    first = ["a", "b", "c", "d", "e", "f"]
+    second = ["b", "a", "x", "d", "c", "y"]
+    similarity = ListSimilarity(first, second, rbo_p=0.8, lazy_compute=True)
+
+    expected = sum(
+        0.2 * 0.8 ** (d - 1) * len(set(first[:d]) & set(second[:d])) / d
+        for d in range(1, 7)
+    )
+    assert similarity.rbo() == approx(expected)
+
+
+def test_rbo_ext_and_bounds_for_uneven_lists():
+    identical = ListSimilarity(["a", "b", "c"], ["a", "b", "c"], lazy_compute=True)
+    assert identical.rbo_ext() == approx(1.0)
+    assert identical.rbo_bounds()[1] == approx(1.0)
+
+    uneven = ListSimilarity(
+        ["a", "b", "c"], ["a", "x", "b", "y", "c", "z"], lazy_compute=True
+    )
+    rbo_min, rbo_max = uneven.rbo_bounds()
+    assert uneven.rbo() <= rbo_min <= uneven.rbo_ext() <= rbo_max <= 1.0
+
+
+def test_rank_metrics_share_one_rank_computation(monkeypatch):
+    calls = []
+    original = ListSimilarity._aligned_ranks
+
+    def counting(self):
+        calls.append(self._ranks is None)
+        return original(self)
+
+    monkeypatch.setattr(ListSimilarity, "_aligned_ranks", counting)
+    similarity = ListSimilarity(["a", "b", "c"], ["c", "a", "d"])
+
+    assert calls.count(True) == 1
+    assert similarity.metrics is not None
+    assert similarity.metrics["bubblesort_distance"] == approx(
+        (1 - similarity.metrics["kendall_tau"]) / 2
+    )
+
+
+def test_matrix_similarity_matches_pairwise_metrics():
+    lists = [
+        ["a", "b", "c", "d"],
+        ["b", "a", "e"],
+        ["f", "c", "a", "b", "g"],
+    ]
+    matrix = MatrixSimilarity(lists, rbo_p=0.8)
+    composite = matrix.composite_score()
+
+    for i, first in enumerate(lists):
+        for j, second in enumerate(lists):
+            pair = ListSimilarity(first, second, rbo_p=0.8)
+            assert pair.metrics is not None
+            for name, values in matrix.metrics.items():
+                assert values[i, j] == approx(pair.metrics[name])
+            assert composite[i, j] == approx(pair.composite_score())
+
+
+def naive_rank_edit_distance(list1, list2, weights):
+    n, m = len(list1), len(list2)
+    rank1 = {item: i for i, item in enumerate(list1)}
+    rank2 = {item: i for i, item in enumerate(list2)}
+    penalty = max(n, m) + 1
+    dp = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        dp[i][0] = dp[i - 1][0] + weights["deletion"] * penalty
+    for j in range(1, m + 1):
+        dp[0][j] = dp[0][j - 1] + weights["insertion"] * penalty
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            substitution = weights["substitution"] * (
+                1 + abs(rank1[list1[i - 1]] - rank2[list2[j - 1]])
+            )
+            dp[i][j] = min(
+                dp[i - 1][j - 1] + (list1[i - 1] != list2[j - 1]) * substitution,
+                dp[i][j - 1] + weights["insertion"] * penalty,
+                dp[i - 1][j] + weights["deletion"] * penalty,
+            )
+            if (
+                i > 1
+                and j > 1
+                and list1[i - 1] == list2[j - 2]
+                and list1[i - 2] == list2[j - 1]
+            ):
+                dp[i][j] = min(dp[i][j], dp[i - 2][j - 2] + weights["transposition"])
+    return dp[n][m]
+
+
+def test_rank_based_edit_distance_matches_full_table():
+    weights = {"insertion": 3, "deletion": 2, "substitution": 1, "transposition": 1}
+    pairs = [
+        (["a", "b", "c", "d"], ["b", "a", "c", "d"]),
+        (["a", "b", "c"], ["x", "a", "c", "b", "y", "z"]),
+        (["a", "b", "a", "c", "d", "e"], ["e", "a"]),
+        ([], ["a"]),
+    ]
+    for first, second in pairs:
+        similarity = ListSimilarity(first, second, lazy_compute=True)
+        assert similarity.rank_based_edit_distance(weights) == naive_rank_edit_distance(
+            first, second, weights
+        )
+
+        scale = max(len(first), len(second))
+        default = {
+            "insertion": scale,
+            "deletion": scale,
+            "substitution": 2 * scale,
+            "transposition": 1,
+        }
+        exact = naive_rank_edit_distance(first, second, default)
+        assert similarity.rank_based_edit_distance() == exact
+        assert similarity.rank_based_edit_distance(band=0) >= exact
+
+
+def test_rank_based_edit_distance_is_a_selectable_metric():
+    base = list("abcdefgh")
+    swapped = ["b", "a", *base[2:]]
+    replaced = [*base[:4], "w", "x", "y", "z"]
+
+    def distance(first, second):
+        similarity = ListSimilarity(first, second, metrics=["rank_based_edit_distance"])
+        return similarity.metrics["rank_based_edit_distance"]
+
+    assert distance(base, base) == 0
+    # Lists of the same length are no longer all at distance 0.
+    assert 0 < distance(base, swapped) < distance(base, base[::-1])
+    assert distance(base, replaced) > 0
+
+
+def test_profiler_records_each_metric():
+    profiler = Profiler()
+    similarity = ListSimilarity(
+        ["a", "b", "c"], ["c", "a", "b"], lazy_compute=False, profiler=profiler
+    )
+    similarity.composite_score()
+
+    for name in ("kendall_tau", "topk_kendall", "rbo", "jaccard_similarity"):
+        assert profiler.stats[name]["calls"] == 1
+        assert profiler.stats[name]["seconds"] >= 0
+    assert "kendall_tau_distance" not in profiler.stats
+    # Shared by several metrics, but only computed once.
+    assert profiler.stats["_kendall"]["calls"] == 1
+    assert profiler.stats["_aligned_ranks"]["calls"] == 1
+    assert "composite_score" in profiler.format_table()
+
+
+def test_selected_metrics_compute_only_what_they_need():
+    profiler = Profiler()
+    similarity = ListSimilarity(
+        ["a", "b", "c", "d"],
+        ["b", "a", "c", "e"],
+        profiler=profiler,
+        metrics=["edit_distance_normalized", "rbo"],
+    )
+
+    assert list(similarity.metrics) == ["edit_distance_normalized", "rbo"]
+    assert profiler.stats["edit_distance"]["calls"] == 1
+    assert "spearman_correlation" not in profiler.stats
+    assert "_kendall" not in profiler.stats
+    with pytest.raises(ValueError):
+        ListSimilarity(["a"], ["a"], metrics=["rbo", "cosine"])
+
+
+def test_lazy_metrics_are_cached_individually():
+    profiler = Profiler()
+    similarity = ListSimilarity(
+        ["a", "b", "c"], ["c", "b", "a"], lazy_compute=True, profiler=profiler
+    )
+
+    assert similarity.metric("rbo") == approx(similarity.rbo())
+    similarity.metric("rbo")
+    assert profiler.stats["rbo"]["calls"] == 2
+    assert "edit_distance" not in profiler.stats
+
+    assert similarity.metrics is None
+    full = ListSimilarity(["a", "b", "c"], ["c", "b", "a"])
+    assert similarity.composite_score() == approx(full.composite_score())
+    assert set(COMPOSITE_METRICS) <= set(similarity.metrics)
+    for name, value in similarity.metrics.items():
+        assert value == approx(full.metrics[name], nan_ok=True)
+    for name in ("bubblesort_distance", "topk_kendall", "topk_footrule"):
+        assert name not in similarity.metrics
+        assert name not in profiler.stats
+
+
+def naive_topk_kendall(list1, list2, penalty):
+    pos1 = {item: idx for idx, item in enumerate(list1)}
+    pos2 = {item: idx for idx, item in enumerate(list2)}
+    union = list(dict.fromkeys([*list1, *list2]))
+    total = 0.0
+    for a in range(len(union)):
+        for b in range(a + 1, len(union)):
+            i, j = union[a], union[b]
+            if i in pos1 and j in pos1 and i in pos2 and j in pos2:
+                total += (pos1[i] - pos1[j]) * (pos2[i] - pos2[j]) < 0
+            elif i in pos1 and j in pos1 and (i in pos2) != (j in pos2):
+                present = i if i in pos2 else j
+                absent = j if present == i else i
+                total += pos1[absent] < pos1[present]
+            elif i in pos2 and j in pos2 and (i in pos1) != (j in pos1):
+                present = i if i in pos1 else j
+                absent = j if present == i else i
+                total += pos2[absent] < pos2[present]
+            elif (i in pos1) != (j in pos1) and (i in pos2) != (j in pos2):
+                total += 1
+            else:
+                total += penalty
+    return total
+
+
+def test_topk_kendall_matches_pairwise_definition():
+    rng = random.Random(7)
+    items = [f"t{i}" for i in range(30)]
+    for _ in range(20):
+        list1 = rng.sample(items, rng.randint(1, 12))
+        list2 = rng.sample(items, rng.randint(1, 12))
+        k1, k2 = len(list1), len(list2)
+        maximum = k1 * k2 + 0.5 * (k1 * (k1 - 1) + k2 * (k2 - 1)) / 2
+        expected = naive_topk_kendall(list1, list2, 0.5) / maximum
+
+        similarity = ListSimilarity(list1, list2, lazy_compute=True)
+        assert similarity.topk_kendall_distance() == approx(expected)
+
+
+def test_topk_metrics_range_and_depth():
+    head = ["a", "b", "c", "d"]
+    assert ListSimilarity(head, head, metrics=["topk_kendall"]).metrics[
+        "topk_kendall"
+    ] == approx(0.0)
+    disjoint = ListSimilarity(head, ["w", "x", "y", "z"], lazy_compute=True)
+    assert disjoint.topk_kendall_distance() == approx(1.0)
+    assert disjoint.topk_footrule_distance() == approx(1.0)
+
+    # Missing items sit at location k + 1: |2-4| + |3-4| + (4-2) over 4+3+2+1+4+3+2.
+    partial = ListSimilarity(head, ["a", "b", "x"], lazy_compute=True)
+    assert partial.topk_footrule_distance() == approx(5 / 19)
+
+    # Only the heads are compared, whatever follows them.
+    deep = ListSimilarity(head + ["e", "f"], head + ["f", "e"], depth=4)
+    assert deep.list1 == head and deep.list2 == head
+    assert deep.metrics["topk_footrule"] == approx(0.0)
+    assert deep.metrics["kendall_tau"] == approx(1.0)
+    # The tails are not even interned, and the vocabulary is not kept.
+    assert deep.ranked1.ids.max() == deep.ranked2.ids.max() == 3
+    assert deep.ranked1.vocabulary is None and deep.ranked2.vocabulary is None
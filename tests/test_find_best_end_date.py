@@ -0,0 +1,61 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from dev.find_best_end_date import (
+    _top_tracks_streamed,
+    _top_tracks_up_to,
+    find_best_end_date,
+)
+from history import load_history
+
+
+def test_streamed_top_tracks_match_loaded_history(tmp_path):
+    rng = np.random.default_rng(5)
+    plays = 400
+    ts = pd.Timestamp("2025-01-01", tz="UTC") + pd.to_timedelta(
+        np.sort(rng.integers(0, 20 * 86400, plays)), unit="s"
+    )
+    track = np.array([f"song {i}" for i in range(150)], dtype=object)[
+        rng.zipf(1.3, plays) % 150
+    ]
+    raw = tmp_path / "raw.csv"
+    pd.DataFrame(
+        {
+            "ts": ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "master_metadata_track_name": track,
+            "ms_played": rng.integers(0, 60000, plays),
+        }
+    ).to_csv(raw, index=False)
+    raw_df = load_history(raw, cache_dir=None).to_frame()
+    raw_df["date"] = raw_df["ts"].dt.date
+
+    for end in [datetime.date(2025, 1, 5), datetime.date(2025, 1, 20)]:
+        streamed = _top_tracks_streamed(str(raw), end, chunksize=37)
+        pd.testing.assert_frame_equal(streamed, _top_tracks_up_to(raw_df, end))
+
+
+def test_sweep_scores_days_without_named_plays(tmp_path):
+    raw = tmp_path / "raw.csv"
+    raw.write_text(
+        "ts,master_metadata_track_name,ms_played\n"
+        "2025-01-01T10:00:00Z,Song A,1000\n"
+        "2025-01-02T10:00:00Z,,1000\n"
+        "2025-01-03T10:00:00Z,Song B,1000\n"
+        "2025-01-03T11:00:00Z,Song B,1000\n"
+    )
+    spotify = tmp_path / "spotify.csv"
+    spotify.write_text("track\nSong B\nSong A\n")
+
+    swept = find_best_end_date(str(spotify), str(raw), "rbo", cache_dir=None)
+    loaded = find_best_end_date(
+        str(spotify), str(raw), "rbo", sweep=False, cache_dir=None
+    )
+
+    assert [date for date, _ in swept[1]] == [
+        datetime.date(2025, 1, 1),
+        datetime.date(2025, 1, 2),
+        datetime.date(2025, 1, 3),
+    ]
+    assert swept == loaded
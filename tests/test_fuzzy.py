@@ -0,0 +1,27 @@
+from editdistance import eval as edit_distance_eval
+
+from fuzzy import TitleIndex
+
+
+def test_title_index_matches_brute_force():
+    titles = ["abcd", "abce", "bcda", "xyz", "", "a", "abcdef", "aabbcc", "abdc"]
+    queries = [*titles, "abc", "zzzz", "bacd", "abcdefgh"]
+
+    for max_distance in range(4):
+        index = TitleIndex(titles, max_distance)
+        for query in queries:
+            expected = sorted(
+                (edit_distance_eval(query, title), idx)
+                for idx, title in enumerate(titles)
+                if edit_distance_eval(query, title) <= max_distance
+            )
+            assert index.query(query) == [
+                (titles[idx], distance) for distance, idx in expected
+            ]
+
+
+def test_title_index_nearest():
+    index = TitleIndex(["Flowers", "Espresso"], max_distance=2)
+
+    assert index.nearest("Expresso") == ("Espresso", 1)
+    assert index.nearest("Sailor Song") is None
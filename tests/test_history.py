@@ -0,0 +1,138 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import history
+from history import (
+    SIGNALS,
+    PlayLog,
+    aggregate_plays,
+    load_history,
+    ranked_by_signal,
+    top_tracks,
+)
+
+
+RAW_CSV = (
+    "ts,master_metadata_track_name,master_metadata_album_artist_name,ms_played\n"
+    "2025-01-01T10:00:00Z,Song A,Artist 1,1000\n"
+    "2025-01-01T11:00:00Z,,,500\n"
+    "2025-01-02T09:00:00Z,Song B,Artist 2,2000\n"
+    "2025-01-02T09:05:00Z,Song A,Artist 1,3000\n"
+)
+
+
+def test_load_history_encodes_columns(tmp_path):
+    raw = tmp_path / "raw.csv"
+    raw.write_text(RAW_CSV)
+
+    log = load_history(raw, cache_dir=None)
+    frame = log.to_frame()
+
+    assert list(log.tracks) == ["Song A", "Song B"]
+    assert list(log.track_codes) == [0, -1, 1, 0]
+    assert frame["track"].isna().tolist() == [False, True, False, False]
+    assert frame["ts"].iloc[2] == pd.Timestamp("2025-01-02T09:00:00Z")
+    assert frame["ms_played"].tolist() == [1000, 500, 2000, 3000]
+
+
+def test_load_history_reuses_and_invalidates_cache(tmp_path, monkeypatch):
+    raw = tmp_path / "raw.csv"
+    raw.write_text(RAW_CSV)
+    cache_dir = tmp_path / "cache"
+    load_history(raw, cache_dir=cache_dir)
+
+    def fail(_):
+        raise AssertionError("source was parsed again")
+
+    monkeypatch.setattr(history, "read_raw_history", fail)
+    stat = raw.stat()
+    os.utime(raw, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert len(load_history(raw, cache_dir=cache_dir)) == 4
+
+    monkeypatch.undo()
+    raw.write_text(RAW_CSV.replace("Song B", "Song C"))
+    assert list(load_history(raw, cache_dir=cache_dir).tracks) == ["Song A", "Song C"]
+
+
+def test_concat_merges_name_dictionaries(tmp_path):
+    first = tmp_path / "first.csv"
+    second = tmp_path / "second.csv"
+    first.write_text(RAW_CSV)
+    second.write_text(RAW_CSV.replace("Song A", "Song Z"))
+
+    log = PlayLog.concat(
+        [load_history(first, cache_dir=None), load_history(second, cache_dir=None)]
+    )
+
+    assert log.to_frame()["track"].dropna().tolist() == [
+        "Song A",
+        "Song B",
+        "Song A",
+        "Song Z",
+        "Song B",
+        "Song Z",
+    ]
+
+
+def test_aggregate_plays_streams_with_filters(tmp_path):
+    raw = tmp_path / "raw.json"
+    raw.write_text(
+        """[
+        {"ts": "2025-01-01T10:00:00Z", "master_metadata_track_name": "B",
+         "ms_played": 40000, "skipped": null},
+        {"ts": "2025-01-01T11:00:00Z", "master_metadata_track_name": "A",
+         "ms_played": 40000, "skipped": null},
+        {"ts": "2025-01-02T09:00:00Z", "master_metadata_track_name": "A",
+         "ms_played": 1000, "skipped": true},
+        {"ts": "2025-01-03T09:00:00Z", "master_metadata_track_name": "B",
+         "ms_played": 50000, "skipped": false}
+        ]"""
+    )
+
+    totals = aggregate_plays(raw, chunksize=1)
+    assert totals["plays"].to_dict() == {"B": 2, "A": 2}
+    assert totals["ms_played"].to_dict() == {"B": 90000, "A": 41000}
+    assert top_tracks(totals, n=1) == ["B"]
+
+    window = aggregate_plays(raw, start="2025-01-01", end="2025-01-02", chunksize=2)
+    assert window["plays"].to_dict() == {"A": 2, "B": 1}
+
+    assert list(aggregate_plays(raw, include_skipped=False).index) == ["B", "A"]
+    assert aggregate_plays(raw, min_ms_played=30000)["plays"].to_dict() == {
+        "B": 2,
+        "A": 1,
+    }
+
+
+def test_aggregate_plays_signals_match_single_frame(tmp_path):
+    rng = np.random.default_rng(2)
+    plays = 300
+    ts = pd.Timestamp("2025-01-01", tz="UTC") + pd.to_timedelta(
+        rng.integers(0, 10 * 86400, plays), unit="s"
+    )
+    frame = pd.DataFrame(
+        {
+            "ts": ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "master_metadata_track_name": rng.choice(list("ABCDEFG"), plays),
+            "ms_played": rng.integers(0, 60000, plays),
+        }
+    )
+    raw = tmp_path / "raw.csv"
+    frame.to_csv(raw, index=False)
+
+    totals = aggregate_plays(raw, long_play_ms=30000, chunksize=7)
+
+    grouped = frame.assign(
+        day=ts.normalize(), long=frame["ms_played"] >= 30000
+    ).groupby("master_metadata_track_name")
+    assert list(totals.columns) == list(SIGNALS)
+    assert totals["plays"].to_dict() == grouped.size().to_dict()
+    assert totals["ms_played"].to_dict() == grouped["ms_played"].sum().to_dict()
+    assert totals["long_plays"].to_dict() == grouped["long"].sum().to_dict()
+    assert totals["days"].to_dict() == grouped["day"].nunique().to_dict()
+
+    ranked = ranked_by_signal(totals, n=3)
+    assert set(ranked) == set(SIGNALS)
+    assert ranked["ms_played"] == top_tracks(totals, n=3, by="ms_played")
@@ -0,0 +1,53 @@
+import numpy as np
+from pytest import approx
+from scipy.stats import kendalltau
+
+from inversions import count_inversions, kendall_distance
+
+
+def naive_inversions(values):
+    return sum(
+        values[i] > values[j]
+        for i in range(len(values))
+        for j in range(i + 1, len(values))
+    )
+
+
+def test_count_inversions_matches_pairwise_count():
+    rng = np.random.default_rng(0)
+    for n in [0, 1, 2, 31, 32, 33, 100]:
+        values = rng.integers(-10, 40, size=n)
+        present = rng.random(n) < 0.7
+        assert count_inversions(values) == naive_inversions(values.tolist())
+        assert count_inversions(values, present) == naive_inversions(
+            values[present].tolist()
+        )
+
+
+def test_count_inversions_batch():
+    rng = np.random.default_rng(1)
+    values = rng.integers(0, 500, size=(9, 70))
+    present = rng.random((9, 70)) < 0.5
+
+    counts = count_inversions(values, present)
+
+    assert counts.tolist() == [
+        naive_inversions(row[mask].tolist()) for row, mask in zip(values, present)
+    ]
+
+
+def test_kendall_distance_matches_scipy():
+    rng = np.random.default_rng(2)
+    ranks1 = np.array([rng.permutation(50) for _ in range(4)])
+    ranks2 = np.array([rng.permutation(50) for _ in range(4)])
+    # Ties fall back to tau-b.
+    ranks2[3, :10] = 0
+
+    tau, distance = kendall_distance(ranks1, ranks2)
+
+    for row in range(4):
+        expected, _ = kendalltau(ranks1[row], ranks2[row])
+        assert tau[row] == approx(expected)
+        assert distance[row] == approx((1 - expected) / 2)
+    assert kendall_distance([0, 1, 2], [2, 1, 0]) == approx((-1.0, 1.0))
+    assert np.isnan(kendall_distance([0], [0])[0])
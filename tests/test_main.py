@@ -1,4 +1,11 @@
-from main import read_lists, standardize_title
+import pandas as pd
+
+from main import (
+    filter_alphanumeric,
+    normalize_titles,
+    read_lists,
+    standardize_title,
+)
 
 
 def test_standardize_title_capwords():
@@ -16,3 +23,28 @@ def test_read_lists_aligns_names(tmp_path):
 
     assert list(first_df["track"]) == ["Hello World", "Another Song"]
     assert list(second_df["track"]) == ["Hello World", "Another Song"]
+
+
+def test_normalize_titles_matches_rowwise_functions():
+    titles = pd.Series(["  hello  wORLD!", "ǆemal 2½", "tab\tsep_x", "hello world!"])
+
+    display, keys = normalize_titles(titles)
+
+    expected = [standardize_title(title) for title in titles]
+    assert display.to_list() == expected
+    assert keys.to_list() == [filter_alphanumeric(title) for title in expected]
+    assert keys.to_list() == ["HelloWorld", "ǅemal2½", "TabSepx", "HelloWorld"]
+
+
+def test_read_lists_fuzzy_matches_near_duplicates(tmp_path):
+    first_csv = tmp_path / "first.csv"
+    second_csv = tmp_path / "second.csv"
+
+    first_csv.write_text("track\nGood Luck Babe\nFlowers\n")
+    second_csv.write_text("track\nGood Luck Baby\nTowers\n")
+
+    _, exact_df = read_lists(str(first_csv), str(second_csv))
+    _, fuzzy_df = read_lists(str(first_csv), str(second_csv), match="fuzzy")
+
+    assert list(exact_df["track"]) == ["Good Luck Baby", "Towers"]
+    assert list(fuzzy_df["track"]) == ["Good Luck Babe", "Towers"]
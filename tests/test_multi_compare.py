@@ -0,0 +1,52 @@
+import json
+
+import multi_compare
+
+
+def test_parallel_results_keep_input_order(tmp_path, capsys):
+    reference = tmp_path / "reference.csv"
+    reference.write_text("track\nAlpha\nBeta\nGamma\n")
+    targets = []
+    for name, rows in [("same", "Alpha\nBeta\nGamma"), ("other", "Delta\nBeta")]:
+        path = tmp_path / f"{name}.csv"
+        path.write_text(f"track\n{rows}\n")
+        targets.append(str(path))
+
+    sequential_csv = tmp_path / "sequential.csv"
+    parallel_csv = tmp_path / "parallel.csv"
+    multi_compare.main(str(reference), targets, 0.9, str(sequential_csv))
+    multi_compare.main(str(reference), targets, 0.9, str(parallel_csv), jobs=2)
+    capsys.readouterr()
+
+    assert parallel_csv.read_text() == sequential_csv.read_text()
+    assert parallel_csv.read_text().splitlines()[1].startswith("same.csv")
+
+
+def test_parallel_run_saves_titles_normalized_in_workers(tmp_path, capsys):
+    reference = tmp_path / "reference.csv"
+    reference.write_text("track\nAlpha\nBeta\n")
+    targets = []
+    for name, rows in [("one", "Gamma\nBeta"), ("two", "Delta\nAlpha")]:
+        path = tmp_path / f"{name}.csv"
+        path.write_text(f"track\n{rows}\n")
+        targets.append(str(path))
+    cache_path = tmp_path / "titles.json"
+
+    multi_compare.main(
+        str(reference), targets, 0.9, None, jobs=2, title_cache_path=str(cache_path)
+    )
+    capsys.readouterr()
+
+    saved = json.loads(cache_path.read_text())["entries"]
+    assert {"Alpha", "Beta", "Gamma", "Delta"} <= {title for title, *_ in saved}
+
+
+def test_plot_names_stay_unique_for_targets_sharing_a_file_name(tmp_path):
+    paths = [
+        str(tmp_path / "runs" / "a" / "top.csv"),
+        str(tmp_path / "runs" / "b" / "top.csv"),
+        str(tmp_path / "other.csv"),
+        str(tmp_path / "runs" / "a" / "top.csv"),
+    ]
+
+    assert multi_compare._plot_names(paths) == ["a_top", "b_top", "other", "a_top-2"]
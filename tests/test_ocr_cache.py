@@ -0,0 +1,63 @@
+import os
+from pathlib import Path
+
+from ocr_cache import OcrCache
+
+
+def test_key_follows_content_and_settings(tmp_path):
+    cache = OcrCache(tmp_path / "cache")
+    image = tmp_path / "shot.png"
+    image.write_bytes(b"pixels")
+    settings = {"tesseract": "5.3.0", "crop": None, "max_width": 1000}
+
+    key = cache.key(image, settings)
+    renamed = image.rename(tmp_path / "renamed.png")
+    assert cache.key(renamed, settings) == key
+    assert cache.key(renamed, {**settings, "max_width": 800}) != key
+    assert cache.key(renamed, {**settings, "tesseract": "5.4.0"}) != key
+    renamed.write_bytes(b"other pixels")
+    assert cache.key(renamed, settings) != key
+
+
+def test_get_put_and_clear(tmp_path):
+    cache = OcrCache(tmp_path)
+    assert cache.get("a") is None
+    cache.put("a", "1 Song\nArtist")
+
+    assert OcrCache(tmp_path).get("a") == "1 Song\nArtist"
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    cache.clear()
+    assert cache.get("a") is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = OcrCache(tmp_path, max_bytes=25)
+    for key in ("a", "b"):
+        cache.put(key, "x" * 10)
+    os.utime(tmp_path / "a.txt", ns=(1, 1))
+    os.utime(tmp_path / "b.txt", ns=(2, 2))
+    cache.get("a")  # now the most recently used
+
+    cache.put("c", "x" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_put_scans_the_directory_once(tmp_path, monkeypatch):
+    OcrCache(tmp_path).put("old", "x" * 10)
+    os.utime(tmp_path / "old.txt", ns=(1, 1))
+    cache = OcrCache(tmp_path, max_bytes=35)
+    scans = []
+    glob = Path.glob
+    monkeypatch.setattr(
+        Path, "glob", lambda self, *args: scans.append(1) or glob(self, *args)
+    )
+
+    for key in "abc":
+        cache.put(key, "x" * 10)
+
+    assert len(scans) == 1
+    assert cache.get("old") is None
+    assert all(cache.get(key) is not None for key in "abc")
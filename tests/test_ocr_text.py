@@ -0,0 +1,58 @@
+from ocr_text import parse_tracks, tracks_frame
+
+
+def test_artists_starting_with_a_number_are_not_ranks():
+    text = (
+        "1 Redrum\n21 Savage\n2 Espresso\nSabrina Carpenter\n"
+        "3 In Da Club\n50 Cent\n4 Not Like Us\nKendrick Lamar\n"
+    )
+
+    assert parse_tracks(text) == [
+        (1, "Redrum", "21 Savage"),
+        (2, "Espresso", "Sabrina Carpenter"),
+        (3, "In Da Club", "50 Cent"),
+        (4, "Not Like Us", "Kendrick Lamar"),
+    ]
+
+
+def test_parse_tracks_skips_an_entry_cut_off_at_the_top():
+    text = "50 Cent\n12 In Da Club\n50 Cent\n13. Espresso\nSabrina Carpenter"
+
+    assert parse_tracks(text) == [
+        (12, "In Da Club", "50 Cent"),
+        (13, "Espresso", "Sabrina Carpenter"),
+    ]
+
+
+def test_parse_tracks_without_artists_or_ranks():
+    assert parse_tracks("#1 Redrum\n#2 Espresso") == [
+        (1, "Redrum", ""),
+        (2, "Espresso", ""),
+    ]
+    assert parse_tracks("Redrum\nEspresso") == [
+        (None, "Redrum", ""),
+        (None, "Espresso", ""),
+    ]
+
+
+def test_tracks_frame_merges_overlapping_screenshots_by_rank():
+    texts = {
+        "2.png": "3 In Da Club\n50 Cent\n4 Not Like Us\nKendrick Lamar",
+        "1.png": "1 Redrum\n21 Savage\n2 Espresso\nSabrina Carpenter\n"
+        "3 In Da Club\n50 Cent",
+    }
+
+    frame = tracks_frame(texts)
+
+    assert frame["track"].tolist() == [
+        "Redrum",
+        "Espresso",
+        "In Da Club",
+        "Not Like Us",
+    ]
+    assert frame["artist"].tolist() == [
+        "21 Savage",
+        "Sabrina Carpenter",
+        "50 Cent",
+        "Kendrick Lamar",
+    ]
@@ -0,0 +1,105 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from history import PlayLog
+from play_index import PlayIndex
+
+
+def _log() -> PlayLog:
+    frame = pd.DataFrame(
+        {
+            "ts": [
+                "2025-01-03T10:00:00Z",
+                "2025-01-01T10:00:00Z",
+                "2025-01-01T11:00:00Z",
+                "2025-01-01T12:00:00Z",
+                "2025-01-05T09:00:00Z",
+                "2025-01-03T23:59:59Z",
+                "2025-01-04T00:00:00Z",
+            ],
+            "track": ["B", "A", "B", "A", "C", None, "A"],
+            "ms_played": [1000, 40000, 40000, 1000, 40000, 40000, 40000],
+        }
+    )
+    return PlayLog.from_frame(frame)
+
+
+def test_counts_over_any_range():
+    index = PlayIndex.from_log(_log())
+
+    assert list(index.tracks) == ["B", "A", "C"]
+    assert index.days == 5
+    assert index.date(0) == datetime.date(2025, 1, 1)
+    assert index.day(datetime.date(2025, 1, 4)) == 3
+    assert index.played_days().tolist() == [0, 2, 3, 4]
+    assert index.counts(0, 4).tolist() == [2, 3, 1]
+    assert index.counts(1, 3).tolist() == [1, 1, 0]
+    assert index.counts(4, 10).tolist() == [0, 0, 1]
+    assert index.top_tracks(0, 2, n=2) == ["B", "A"]
+    assert index.top_tracks(0, 4) == ["A", "B", "C"]
+
+
+def test_counts_match_filtered_plays():
+    rng = np.random.default_rng(1)
+    plays = 500
+    ts = pd.Timestamp("2025-01-01", tz="UTC") + pd.to_timedelta(
+        rng.integers(0, 40 * 86400, plays), unit="s"
+    )
+    frame = pd.DataFrame(
+        {
+            "ts": ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "track": rng.choice(list("ABCDEFGHIJ"), plays),
+            "ms_played": rng.integers(0, 60000, plays),
+        }
+    )
+    log = PlayLog.from_frame(frame)
+    index = PlayIndex.from_log(log, min_ms_played=30000)
+    decoded = log.to_frame()
+    days = decoded["ts"].dt.date.map(index.day)
+
+    for start, end in [(0, 39), (5, 5), (3, 17), (30, 45)]:
+        kept = decoded[(days >= start) & (days <= end)]
+        kept = kept[kept["ms_played"] >= 30000]
+        expected = kept["track"].value_counts()
+        counts = index.counts(start, end)
+        assert {
+            track: count for track, count in zip(index.tracks, counts) if count
+        } == expected.to_dict()
+
+
+def test_save_and_load(tmp_path):
+    index = PlayIndex.from_log(_log())
+    index.save(tmp_path / "index")
+
+    loaded = PlayIndex.load(tmp_path / "index")
+
+    assert list(loaded.tracks) == list(index.tracks)
+    assert loaded.first_day == index.first_day
+    assert loaded.counts(1, 4).tolist() == index.counts(1, 4).tolist()
+
+
+def test_ties_go_to_the_track_first_in_the_log():
+    frame = pd.DataFrame(
+        {
+            "ts": [
+                "2025-01-01T10:00:00Z",
+                "2025-01-02T10:00:00Z",
+                "2025-01-02T11:00:00Z",
+                "2025-01-03T10:00:00Z",
+            ],
+            "track": ["A", "B", "A", "B"],
+            "ms_played": [40000, 40000, 40000, 40000],
+        }
+    )
+    index = PlayIndex.from_log(PlayLog.from_frame(frame))
+    second_day = frame[frame["ts"].str.startswith("2025-01-02")]
+
+    # From the first day on, the order is value_counts' order.
+    assert index.top_tracks(0, 2) == ["A", "B"]
+    assert frame["track"].value_counts().index.tolist() == ["A", "B"]
+    # Later windows still break the B/A tie by the log's order, where
+    # value_counts goes by first appearance within the window.
+    assert index.top_tracks(1, 1) == ["A", "B"]
+    assert second_day["track"].value_counts().index.tolist() == ["B", "A"]
@@ -16,3 +16,35 @@ def test_rank_alignment_matrix_runs(monkeypatch):
     ]
 
     assert plots.rank_alignment_matrix(reference, comparisons, top_k=4) is None
+
+
+def test_connection_graph_renderer_reuses_artists(tmp_path):
+    renderer = plots.ConnectionGraphRenderer(top_k=3)
+    artists = len(renderer.ax.get_children())
+
+    first = renderer.render(["A", "B", "C", "D"], ["B", "A", "E"], tmp_path / "1.png")
+    second = renderer.render(["X"], ["X", "Y"], tmp_path / "2.svg")
+
+    assert first.stat().st_size > 0
+    assert second.read_text().lstrip().startswith("<?xml")
+    assert len(renderer.ax.get_children()) == artists
+    assert sum(line.get_visible() for line in renderer.lines) == 1
+    assert [label.get_visible() for label in renderer.list1_labels] == [
+        True,
+        False,
+        False,
+    ]
+
+
+def test_render_connection_graphs_in_parallel(tmp_path):
+    reference = ["Alpha", "Beta", "Gamma"]
+    pairs = [
+        ("b", reference, ["Beta", "Alpha", "Delta"]),
+        ("c", reference, ["Gamma", "Alpha"]),
+        ("d", reference, []),
+    ]
+
+    paths = plots.render_connection_graphs(pairs, tmp_path / "out", jobs=2)
+
+    assert [path.name for path in paths] == ["b.png", "c.png", "d.png"]
+    assert all(path.stat().st_size > 0 for path in paths)
@@ -0,0 +1,88 @@
+import numpy as np
+from pytest import approx
+
+from compare import ListSimilarity
+from ranked_list import RankedList
+
+
+def test_ranked_lists_give_the_same_metrics():
+    first = ["a", "b", "c", "d", "e", "b"]
+    second = ["c", "a", "x", "b"]
+    vocabulary: dict = {}
+    ranked1 = RankedList(first, vocabulary)
+    ranked2 = RankedList(second, vocabulary)
+
+    plain = ListSimilarity(first, second)
+    encoded = ListSimilarity(ranked1, ranked2)
+    mixed = ListSimilarity(ranked1, second)
+
+    for name, value in plain.metrics.items():
+        assert encoded.metrics[name] == approx(value, nan_ok=True)
+        assert mixed.metrics[name] == approx(value, nan_ok=True)
+    assert encoded.rank_based_edit_distance() == approx(
+        plain.rank_based_edit_distance()
+    )
+    assert encoded.list1 == first
+
+
+def test_ranked_list_interning_and_lookups():
+    vocabulary: dict = {}
+    ranked = RankedList(["x", "y", "x", "z"], vocabulary)
+    other = RankedList(["z", "w"], vocabulary)
+
+    assert ranked.ids.tolist() == [0, 1, 0, 2]
+    assert ranked.ids.dtype == np.int32
+    assert other.ids.tolist() == [2, 3]
+    assert ranked.unique_ids.tolist() == [0, 1, 2]
+    assert ranked.first_positions.tolist() == [0, 1, 3]
+    assert ranked.last_positions.tolist() == [2, 1, 3]
+    assert other.distinct_ids.tolist() == [2, 3]
+    assert other.distinct_ranks.tolist() == [0, 1]
+    assert other.locate(np.array([3, 0, 2, 9])).tolist() == [1, -1, 0, -1]
+    assert not ranked.is_distinct and other.is_distinct
+    assert ranked.head(2).ids.tolist() == [0, 1]
+    assert ranked.head(10) is ranked
+
+    # A list from another vocabulary is re-encoded rather than compared by ID.
+    foreign = RankedList(["w", "z"], {})
+    assert RankedList.encode(foreign, vocabulary).ids.tolist() == [3, 2]
+    assert ListSimilarity(other, foreign).metrics["jaccard_similarity"] == 1.0
+
+    # Without a vocabulary, every list interns into one of its own.
+    alone = RankedList(["w", "z"])
+    assert alone.ids.tolist() == [0, 1]
+    assert alone.vocabulary is not RankedList(["v"]).vocabulary
+
+
+def test_array_metrics_match_with_duplicates_and_empty_lists():
+    cases = [
+        (["a", "b", "a", "c", "d", "d"], ["d", "x", "a", "y", "x", "b"]),
+        (["a", "b", "c"], []),
+        ([], []),
+        (["p", "q"], ["r", "s", "t"]),
+    ]
+    for first, second in cases:
+        similarity = ListSimilarity(first, second)
+        # Reference values from plain Python sets and dicts.
+        set1, set2 = set(first), set(second)
+        union = set1 | set2
+        jaccard = len(set1 & set2) / len(union) if union else 0
+        assert similarity.metrics["jaccard_similarity"] == approx(jaccard)
+        k = min(len(first), len(second))
+        overlaps = [len(set(first[:d]) & set(second[:d])) for d in range(1, k + 1)]
+        assert similarity._overlap_sweep(k) == overlaps
+
+
+def test_items_are_not_copied_and_dropped_vocabularies_reencode():
+    items = ["x", "y", "z"]
+    ranked = RankedList(items)
+    assert ranked.items is items
+
+    ranked.drop_vocabulary()
+    assert ranked.vocabulary is None
+    # Without its vocabulary the list is re-encoded, even into a fresh one.
+    assert RankedList.encode(ranked) is not ranked
+    assert RankedList.encode(ranked).ids.tolist() == [0, 1, 2]
+    assert ListSimilarity(ranked, ["z", "y"]).metrics["jaccard_similarity"] == approx(
+        2 / 3
+    )
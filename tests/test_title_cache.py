@@ -0,0 +1,43 @@
+import json
+
+import pandas as pd
+
+import title_cache
+from main import normalize_titles
+from title_cache import TitleCache
+
+
+def upper(titles):
+    return [(title.upper(), title) for title in titles]
+
+
+def test_title_cache_evicts_least_recently_used():
+    cache = TitleCache(maxsize=2)
+    cache.normalize_many(["a", "b"], upper)
+    cache.normalize_many(["a"], upper)
+    cache.normalize_many(["c"], upper)
+
+    computed = []
+    cache.normalize_many(["a", "b"], lambda t: computed.extend(t) or upper(t))
+    assert computed == ["b"]
+    assert len(cache) == 2
+
+
+def test_title_cache_persists_per_version(tmp_path, monkeypatch):
+    path = tmp_path / "titles.json"
+    cache = TitleCache(path=path)
+    display, _ = normalize_titles(pd.Series(["  hello world!", None]), cache)
+    cache.save()
+
+    def fail(_):
+        raise AssertionError("title was normalized again")
+
+    reloaded = TitleCache(path=path)
+    assert reloaded.normalize_many(["  hello world!"], fail) == [
+        ("Hello World!", "HelloWorld")
+    ]
+    assert display.isna().to_list() == [False, True]
+
+    monkeypatch.setattr(title_cache, "NORMALIZATION_VERSION", 2)
+    assert len(TitleCache(path=path)) == 0
+    assert json.loads(path.read_text())["version"] == 1
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from history import PlayLog
+from play_index import PlayIndex, top_codes
+from windows import RollingWindows, WindowSearch, score_windows
+
+
+def _random_log(seed: int = 0, plays: int = 2000, tracks: int = 40) -> PlayLog:
+    rng = np.random.default_rng(seed)
+    ts = pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(
+        np.sort(rng.integers(0, 90 * 24 * 3600, plays)), unit="s"
+    )
+    names = np.array([f"Song {i}" for i in range(tracks)], dtype=object)
+    track = names[rng.zipf(1.5, plays) % tracks]
+    track[rng.random(plays) < 0.02] = None
+    frame = pd.DataFrame(
+        {
+            "ts": ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "track": track,
+            "ms_played": rng.integers(0, 300_000, plays),
+        }
+    )
+    return PlayLog.from_frame(frame.sample(frac=1, random_state=seed))
+
+
+def _naive_top(frame: pd.DataFrame, codes: dict, start, end, n: int) -> list[str]:
+    days = frame["ts"].dt.date
+    played = frame[(days >= start) & (days <= end)]["track"].dropna()
+    counts = played.value_counts()
+    order = sorted(counts.index, key=lambda track: (-counts[track], codes[track]))
+    return order[:n]
+
+
+def test_rolling_windows_match_reaggregation():
+    log = _random_log()
+    frame = log.to_frame()
+    codes = {track: code for code, track in enumerate(log.tracks)}
+
+    for window_days, step_days in [(30, 1), (7, 3), (5, 9)]:
+        windows = RollingWindows(
+            PlayIndex.from_log(log), window_days, step_days, top_n=10
+        )
+        results = list(windows)
+
+        assert len(results) == len(windows) > 0
+        assert results[0].start == frame["ts"].min().date()
+        for window in results:
+            assert (window.end - window.start).days == window_days - 1
+            expected = _naive_top(frame, codes, window.start, window.end, 10)
+            assert window.tracks == expected
+
+
+def test_top_codes_breaks_ties_by_code():
+    counts = np.array([2, 5, 0, 5, 2, 1])
+
+    assert top_codes(counts, 3).tolist() == [1, 3, 0]
+    assert top_codes(counts, 10).tolist() == [1, 3, 0, 4, 5]
+
+
+def test_score_windows_against_reference_and_previous():
+    index = PlayIndex.from_log(_random_log())
+    windows = RollingWindows(index, window_days=14, step_days=7, top_n=10)
+    first = next(iter(windows))
+
+    scored = list(
+        score_windows(windows, reference=first.tracks, metrics=["jaccard_similarity"])
+    )
+    assert scored[0][1] == {"jaccard_similarity": 1.0}
+    assert all(0 <= scores["jaccard_similarity"] <= 1 for _, scores in scored)
+
+    drift = list(score_windows(windows, metrics=["jaccard_similarity"]))
+    assert drift[0][1] == {}
+    assert len(drift[1][1]) == 1
+
+
+def test_window_search_finds_the_window_of_the_reference():
+    index = PlayIndex.from_log(_random_log(seed=3, plays=3000))
+    search = WindowSearch(
+        index,
+        reference=index.top_tracks(20, 49, 10),
+        metric="rbo",
+        top_n=10,
+        min_days=5,
+    )
+
+    exact = search.search(top=3, coarse_step=1)
+    found = search.search(top=1)
+
+    assert len(exact) == 3 and exact[0].score >= exact[1].score >= exact[2].score
+    assert found[0].score == exact[0].score
+    assert len(search._scores) < search.days**2 // 2
+
+
+def test_index_counts_match_rolling_windows():
+    index = PlayIndex.from_log(_random_log(seed=4))
+
+    for start, counts in RollingWindows(index, window_days=9, step_days=4).counts():
+        assert np.array_equal(index.counts(start, start + 8), counts)
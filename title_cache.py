@@ -0,0 +1,116 @@
+import json
+import os
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+
+# Bump whenever standardize_title or the matching key changes, so entries
+# normalized by older rules are not reused.
+NORMALIZATION_VERSION = 1
+DEFAULT_MAXSIZE = 200_000
+
+
+class TitleCache:
+    def __init__(
+        self, maxsize: int = DEFAULT_MAXSIZE, path: str | Path | None = None
+    ) -> None:
+        """
+        Bounded LRU cache of raw title -> (display title, matching key).
+
+        Parameters:
+            maxsize: Maximum number of titles kept; the least recently used are
+                evicted first.
+            path: Optional JSON file the cache is loaded from and saved to, so
+                separate runs share normalization results.
+        """
+        self.maxsize = maxsize
+        self.path = Path(path) if path is not None else None
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        self._computed: dict[str, tuple[str, str]] = {}
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def normalize_many(
+        self,
+        titles: Iterable[str],
+        compute: Callable[[list[str]], list[tuple[str, str]]],
+    ) -> list[tuple[str, str]]:
+        """
+        Look up every title, computing the misses in a single batch.
+        """
+        titles = list(titles)
+        found = {}
+        for title in titles:
+            entry = self._entries.get(title)
+            if entry is not None:
+                self._entries.move_to_end(title)
+                found[title] = entry
+
+        missing = list(dict.fromkeys(t for t in titles if t not in found))
+        self.hits += len(titles) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            for title, entry in zip(missing, compute(missing)):
+                found[title] = entry
+                self._entries[title] = entry
+                self._computed[title] = entry
+            self._evict()
+
+        return [found[title] for title in titles]
+
+    def take_computed(self) -> dict[str, tuple[str, str]]:
+        """
+        The entries computed since the last call, e.g. to hand them from a
+        worker process to the one that saves the cache.
+        """
+        computed, self._computed = self._computed, {}
+        return computed
+
+    def update(self, entries: dict[str, tuple[str, str]]) -> None:
+        """Add entries, such as those taken from another process's cache."""
+        for title, entry in entries.items():
+            self._entries[title] = entry
+            self._entries.move_to_end(title)
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.maxsize:
+            title, _ = self._entries.popitem(last=False)
+            self._computed.pop(title, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._computed.clear()
+
+    def load(self) -> None:
+        """
+        Load entries from path, ignoring files written by another version.
+        """
+        assert self.path is not None, "Cache has no path"
+        with open(self.path, encoding="utf-8") as f:
+            stored = json.load(f)
+        if stored.get("version") != NORMALIZATION_VERSION:
+            return
+        for title, display, key in stored["entries"][-self.maxsize :]:
+            self._entries[title] = (display, key)
+
+    def save(self) -> None:
+        """
+        Write entries to path, least recently used first.
+        """
+        assert self.path is not None, "Cache has no path"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        stored = {
+            "version": NORMALIZATION_VERSION,
+            "entries": [[title, *entry] for title, entry in self._entries.items()],
+        }
+        temp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(stored, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
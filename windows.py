@@ -0,0 +1,401 @@
+import argparse
+import datetime
+import functools
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from compare import METRICS, ListSimilarity
+from history import DEFAULT_CACHE_DIR, load_history
+from main import normalize_titles, read_list
+from play_index import PlayIndex, top_codes
+from ranked_list import RankedList
+
+
+@dataclass
+class Window:
+    """
+    The top tracks of one window of days.
+
+    start and end are inclusive UTC calendar days. codes are the tracks' codes
+    in the PlayIndex, best first, and plays their play counts in the window.
+    """
+
+    start: datetime.date
+    end: datetime.date
+    codes: np.ndarray
+    tracks: list[str]
+    plays: np.ndarray
+
+
+def _title_keys(titles) -> np.ndarray:
+    """Normalized matching keys of titles, as fix_names compares them."""
+    _, keys = normalize_titles(pd.Series(titles, dtype=object))
+    return keys.to_numpy()
+
+
+class RollingWindows:
+    def __init__(
+        self,
+        index: PlayIndex,
+        window_days: int = 30,
+        step_days: int = 1,
+        top_n: int = 100,
+    ):
+        """
+        Top tracks of a sliding window of days over a listening history.
+
+        Sliding the window only subtracts the per-day counts of the days that
+        leave it and adds those of the days that enter it, so every step costs
+        the track-days that changed plus one pass over the per-track counts to
+        rank them, never a re-aggregation of the whole window. Windows lie
+        entirely within the history: the first one starts on the day of the
+        first play.
+
+        Parameters:
+            index: The per-day play counts of the history.
+            window_days: Length of each window in days.
+            step_days: Days between the starts of consecutive windows.
+            top_n: Length of the ranked list of each window.
+        """
+        if window_days < 1 or step_days < 1:
+            raise ValueError("window_days and step_days must be positive")
+        self.index = index
+        self.window_days = window_days
+        self.step_days = step_days
+        self.top_n = top_n
+        self.tracks = index.tracks
+        self.days = index.days
+
+    def __len__(self) -> int:
+        """The number of windows."""
+        if self.days < self.window_days:
+            return 0
+        return (self.days - self.window_days) // self.step_days + 1
+
+    def _add_days(self, counts: np.ndarray, first: int, stop: int, sign: int) -> None:
+        """Add (sign 1) or subtract (sign -1) the counts of days [first, stop)."""
+        daily = self.index.daily
+        entries = slice(daily.indptr[first], daily.indptr[max(first, stop)])
+        np.add.at(counts, daily.indices[entries], sign * daily.data[entries])
+
+    def counts(self) -> Iterator[tuple[int, np.ndarray]]:
+        """
+        Yield (first day, per-track play counts) of every window in order.
+
+        The count array is updated in place for the next window, so copy it to
+        keep it.
+        """
+        counts = np.zeros(len(self.tracks), dtype=np.int64)
+        counted = (0, 0)
+        for start in range(0, len(self) * self.step_days, self.step_days):
+            stop = start + self.window_days
+            low, high = counted
+            self._add_days(counts, low, min(high, start), -1)
+            self._add_days(counts, max(high, start), stop, 1)
+            counted = (start, stop)
+            yield start, counts
+
+    def __iter__(self) -> Iterator[Window]:
+        for start, counts in self.counts():
+            codes = top_codes(counts, self.top_n)
+            yield Window(
+                start=self.index.date(start),
+                end=self.index.date(start + self.window_days - 1),
+                codes=codes,
+                tracks=self.tracks[codes].tolist(),
+                plays=counts[codes],
+            )
+
+
+def score_windows(
+    windows: RollingWindows,
+    reference: list[str] | None = None,
+    metrics=None,
+    rbo_p: float = 0.9,
+) -> Iterator[tuple[Window, dict[str, float]]]:
+    """
+    Score the top list of every window against a reference list.
+
+    Without a reference, each window is scored against the previous one, which
+    measures how the top list drifts; the first window then has no scores.
+    Titles are matched by their normalized key, as fix_names does. The
+    reference and every track are normalized once, and the reference's lookup
+    tables are shared by all comparisons.
+
+    Parameters:
+        windows: The windows to score.
+        reference: Optional ranked list of track titles, best first.
+        metrics: Names of the metrics to compute (see METRICS); None selects
+            all of them.
+        rbo_p: The weight decay parameter for RBO.
+    """
+    vocabulary: dict = {}
+    track_keys = _title_keys(windows.tracks)
+    fixed = None
+    if reference is not None:
+        fixed = RankedList(_title_keys(reference), vocabulary)
+
+    previous = None
+    for window in windows:
+        current = RankedList(track_keys[window.codes], vocabulary)
+        against = fixed if fixed is not None else previous
+        scores = {}
+        if against is not None:
+            similarity = ListSimilarity(against, current, rbo_p=rbo_p, metrics=metrics)
+            scores = similarity.metrics
+        previous = current
+        yield window, scores
+
+
+@dataclass
+class ScoredWindow:
+    start: datetime.date
+    end: datetime.date
+    score: float
+
+
+class WindowSearch:
+    def __init__(
+        self,
+        index: PlayIndex,
+        reference: list[str],
+        metric: str = "rbo",
+        top_n: int = 100,
+        min_days: int = 1,
+        rbo_p: float = 0.9,
+    ):
+        """
+        Search the start and end days whose top list best matches a reference.
+
+        The index keeps cumulative per-track counts, so the counts of any
+        window are the difference of two running totals, whatever the
+        window's length.
+
+        Parameters:
+            index: The per-day play counts of the history.
+            reference: Ranked list of track titles to match, best first.
+            metric: Name of the metric to maximize (see METRICS); use one
+                where higher means more similar.
+            top_n: Length of the top list of each window.
+            min_days: Shortest window considered.
+            rbo_p: The weight decay parameter for RBO.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        self.metric = metric
+        self.top_n = top_n
+        self.min_days = max(1, min_days)
+        self.rbo_p = rbo_p
+        self.index = index
+        self.days = index.days
+        # The search keeps returning to the same start and end days, and the
+        # counts of a window are two of these running totals.
+        self._plays_before = functools.lru_cache(maxsize=128)(index.plays_before)
+
+        vocabulary: dict = {}
+        self._track_keys = _title_keys(index.tracks)
+        self._reference = RankedList(_title_keys(reference), vocabulary)
+        self._vocabulary = vocabulary
+        self._scores: dict[tuple[int, int], float] = {}
+
+    def score(self, start: int, end: int) -> float:
+        """The metric of the window start..end, computed once per window."""
+        if (start, end) not in self._scores:
+            counts = self._plays_before(end + 1) - self._plays_before(start)
+            codes = top_codes(counts, self.top_n)
+            ranked = RankedList(self._track_keys[codes], self._vocabulary)
+            similarity = ListSimilarity(
+                self._reference,
+                ranked,
+                rbo_p=self.rbo_p,
+                lazy_compute=True,
+                metrics=[self.metric],
+            )
+            self._scores[(start, end)] = similarity.metric(self.metric)
+        return self._scores[(start, end)]
+
+    def _valid(self, start: int, end: int) -> bool:
+        return 0 <= start and end < self.days and end - start + 1 >= self.min_days
+
+    def _best(self, windows, count: int) -> list[tuple[int, int]]:
+        def key(window: tuple[int, int]) -> tuple[float, int, int]:
+            # NaN scores (e.g. correlations of too short lists) rank last, and
+            # ties go to the earlier window so the refinement is deterministic.
+            score = self.score(*window)
+            return (np.inf if np.isnan(score) else -score, *window)
+
+        return sorted(windows, key=key)[:count]
+
+    def search(
+        self, top: int = 5, coarse_step: int | None = None, beam: int = 8
+    ) -> list[ScoredWindow]:
+        """
+        The top windows by score, best first, found coarse to fine.
+
+        Every window on a grid of coarse_step days is scored first. The beam
+        best windows found so far are then refined: their starts and ends move
+        by half the previous step in each direction, down to single days, and
+        at one day the moves repeat until the beam stops improving. This scores
+        a few thousand windows instead of all days^2 / 2 of them, at the risk of
+        missing a narrow peak between grid points; coarse_step=1 scores every
+        window and is exact.
+
+        Parameters:
+            top: Number of windows to return.
+            coarse_step: Grid spacing in days; by default about 32 grid points
+                span the history.
+            beam: Number of windows refined at each level.
+        """
+        if self.days < self.min_days:
+            return []
+        step = coarse_step or max(1, self.days // 32)
+        grid = list(range(0, self.days, step))
+        if grid[-1] != self.days - 1:
+            grid.append(self.days - 1)
+        candidates = [
+            (start, end) for start in grid for end in grid if self._valid(start, end)
+        ]
+        if not candidates:
+            # The shortest window is longer than the grid spacing allows.
+            candidates = [(0, self.days - 1)]
+        kept = self._best(candidates, beam)
+
+        while True:
+            step = max(1, step // 2)
+            neighbors = {
+                (start + move_start, end + move_end)
+                for start, end in kept
+                for move_start in (-step, 0, step)
+                for move_end in (-step, 0, step)
+                if self._valid(start + move_start, end + move_end)
+            }
+            refined = self._best(neighbors.union(kept), beam)
+            if step == 1 and refined == kept:
+                break
+            kept = refined
+
+        return [
+            ScoredWindow(
+                self.index.date(start), self.index.date(end), self.score(start, end)
+            )
+            for start, end in self._best(self._scores, top)
+        ]
+
+
+def main(
+    raw_paths: list[str] | None = None,
+    reference_path: str | None = None,
+    window_days: int = 30,
+    step_days: int = 1,
+    top_n: int = 100,
+    metrics=None,
+    rbo_p: float = 0.9,
+    csv_path: str | None = None,
+    cache_dir: str | None = DEFAULT_CACHE_DIR,
+    index_path: str | None = None,
+) -> None:
+    if index_path:
+        index = PlayIndex.load(index_path)
+    else:
+        index = PlayIndex.from_log(load_history(raw_paths, cache_dir=cache_dir))
+    windows = RollingWindows(
+        index,
+        window_days=window_days,
+        step_days=step_days,
+        top_n=top_n,
+    )
+    reference = None
+    if reference_path:
+        reference = read_list(reference_path)["track"].to_list()
+
+    rows = []
+    for window, scores in score_windows(windows, reference, metrics, rbo_p):
+        top = window.tracks[0] if window.tracks else ""
+        rows.append({"start": window.start, "end": window.end, "top": top, **scores})
+        values = "  ".join(f"{name}: {score:.3f}" for name, score in scores.items())
+        print(f"{window.start} - {window.end}  {values}")
+
+    if csv_path:
+        pd.DataFrame(rows).to_csv(csv_path, index=False)
+        print(f"\nSaved {len(rows)} windows to {csv_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Track the top list of a sliding window over a listening history."
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "--raw",
+        nargs="+",
+        help="raw Extended Streaming History exports (CSV or JSON)",
+    )
+    source.add_argument(
+        "--index",
+        help="play index saved by play_index.py, instead of --raw",
+    )
+    parser.add_argument(
+        "--reference",
+        help="CSV top list (e.g. Wrapped) to score every window against; by "
+        "default each window is scored against the previous one",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=30,
+        help="window length in days (default: 30)",
+    )
+    parser.add_argument(
+        "--step",
+        type=int,
+        default=1,
+        help="days between consecutive windows (default: 1)",
+    )
+    parser.add_argument(
+        "--top-n",
+        type=int,
+        default=100,
+        help="length of each window's top list (default: 100)",
+    )
+    parser.add_argument(
+        "--metrics",
+        nargs="+",
+        choices=list(METRICS),
+        default=["rbo", "jaccard_similarity"],
+        help="metrics to compute per window (default: rbo jaccard_similarity)",
+    )
+    parser.add_argument(
+        "--rbo-p",
+        type=float,
+        default=0.9,
+        help="RBO similarity parameter p (default: 0.9)",
+    )
+    parser.add_argument(
+        "--out-csv",
+        help="save the windows and their scores to this CSV",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_const",
+        const=None,
+        default=DEFAULT_CACHE_DIR,
+        dest="cache_dir",
+        help="parse the raw history instead of using the columnar cache",
+    )
+    args = parser.parse_args()
+
+    main(
+        raw_paths=args.raw,
+        reference_path=args.reference,
+        window_days=args.window,
+        step_days=args.step,
+        top_n=args.top_n,
+        metrics=args.metrics,
+        rbo_p=args.rbo_p,
+        csv_path=args.out_csv,
+        cache_dir=args.cache_dir,
+        index_path=args.index,
+    )